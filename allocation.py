@@ -0,0 +1,374 @@
+import heapq
+import math
+from fractions import Fraction
+from functools import cmp_to_key
+
+import numpy as np
+
+
+# Metody dzielnikowe różnią się tylko ciągiem dzielników: funkcja size -> tablica `size` pierwszych dzielników.
+# Nowa metoda wymaga jedynie wpisu w rejestrze DIVISOR_METHODS (register_divisor_method).
+DIVISOR_METHODS = {}
+
+# Tryb dokładny: kwadraty dzielników jako ułamki (nazwa -> size -> lista Fraction). Kwocjenty porównujemy
+# przez v_i^2 * d_j^2 i v_j^2 * d_i^2, więc także pierwiastki (Huntington-Hill) nie wymagają przybliżeń.
+EXACT_DIVISORS = {}
+
+# Zerowy dzielnik (Adams, Huntington-Hill) zastępujemy bardzo małą liczbą: każdy komitet z głosami
+# dostaje najpierw po mandacie, a kolejność między nimi nadal wyznacza poparcie
+ZERO_DIVISOR = 1e-300
+
+
+def register_divisor_method(name, divisors, squared_divisors=None):
+    # squared_divisors: dokładne kwadraty dzielników; domyślnie z wartości zmiennoprzecinkowych,
+    # co jest dokładne dla dzielników całkowitych
+    DIVISOR_METHODS[name] = divisors
+    if squared_divisors is None:
+        def squared_divisors(size):
+            return [Fraction(float(divisor)) ** 2 for divisor in divisors(size)]
+    EXACT_DIVISORS[name] = squared_divisors
+
+
+def divisor_table(divisors, size):
+    return np.maximum(np.asarray(divisors(size), dtype=float), ZERO_DIVISOR)
+
+
+def dhondt_divisors(size):
+    return np.arange(1, size + 1, dtype=float)  # Dzielniki: 1, 2, 3, ...
+
+
+def saintelague_divisors(size):
+    return 2 * np.arange(1, size + 1, dtype=float) - 1  # Dzielniki: 1, 3, 5, ...
+
+
+def modified_saintelague_divisors(size):
+    divisors = saintelague_divisors(size)
+    divisors[:1] = 1.4  # Dzielniki: 1.4, 3, 5, ...
+    return divisors
+
+
+def danish_divisors(size):
+    return 3 * np.arange(size, dtype=float) + 1  # Dzielniki: 1, 4, 7, ...
+
+
+def adams_divisors(size):
+    return np.arange(size, dtype=float)  # Dzielniki: 0, 1, 2, ...
+
+
+def imperiali_divisors(size):
+    return np.arange(2, size + 2, dtype=float)  # Dzielniki: 2, 3, 4, ...
+
+
+def huntington_hill_divisors(size):
+    k = np.arange(size, dtype=float)
+    return np.sqrt(k * (k + 1))  # Dzielniki: 0, √2, √6, ...
+
+
+register_divisor_method("dHondt", dhondt_divisors)
+register_divisor_method("SainteLague", saintelague_divisors)
+register_divisor_method("SainteLagueModified", modified_saintelague_divisors,
+                        lambda size: [Fraction(49, 25)] + [Fraction((2 * k - 1) ** 2) for k in range(2, size + 1)])
+register_divisor_method("Danish", danish_divisors)
+register_divisor_method("Adams", adams_divisors)
+register_divisor_method("Imperiali", imperiali_divisors)
+register_divisor_method("HuntingtonHill", huntington_hill_divisors,
+                        lambda size: [Fraction(k * (k + 1)) for k in range(size)])
+
+
+def group_by_size(sizes):
+    # Okręgi o tej samej liczbie mandatów liczymy jedną operacją macierzową
+    sizes = np.asarray(sizes)
+    return [(int(size), np.flatnonzero(sizes == size)) for size in np.unique(sizes)]
+
+
+def select_top(values, k):
+    # Maska k największych wartości w każdym wierszu (ostatnia oś) bez pełnego sortowania
+    n = values.shape[-1]
+    kth = np.partition(values, n - k, axis=-1)[..., n - k:n - k + 1]
+    selected = values >= kth
+    ties = selected.sum(axis=-1) > k
+    if ties.any():
+        # Remisy na granicy rozstrzyga kolejność w wierszu - tak samo jak stabilny sort malejący
+        tied, tied_kth = values[ties], kth[ties]
+        greater = tied > tied_kth
+        equal = tied == tied_kth
+        missing = k - greater.sum(axis=-1, keepdims=True)
+        selected[ties] = greater | (equal & (np.cumsum(equal, axis=-1) <= missing))
+    return selected
+
+
+def allocate_divisor(support, sizes, divisors):
+    # support: (..., okręgi, komitety) po odcięciu progów, sizes: (okręgi,)
+    support = np.asarray(support, dtype=float)
+    n_committees = support.shape[-1]
+    mandates = np.zeros(support.shape, dtype=np.int64)
+    for size, idx in group_by_size(sizes):
+        local = support[..., idx, :]
+        # Macierz kwocjentów w kolejności (dzielnik, komitet), jak w liście z pierwotnej implementacji
+        quotients = local[..., None, :] / divisor_table(divisors, size)[:, None]
+        flat = quotients.reshape(local.shape[:-1] + (size * n_committees,))
+        selected = select_top(flat, size).reshape(quotients.shape)
+        mandates[..., idx, :] = selected.sum(axis=-2)
+    return mandates
+
+
+TIE_BREAKS = ("order", "votes", "lot", "votes_lot")
+
+# Względna odległość od granicznego kwocjentu, poniżej której kolejność ustalamy dokładnie, a nie z float
+EXACT_TOLERANCE = 1e-9
+
+
+def exact_votes(support):
+    # Tryb dokładny: liczby całkowite głosów albo ułamki (Fraction) sprowadzone do wspólnego mianownika
+    support = np.asarray(support)
+    if support.dtype.kind in 'iu':
+        return support.astype(np.int64)
+    if support.dtype == object:
+        denominator = math.lcm(*(getattr(value, 'denominator', 1) for value in support.flat))
+        return np.vectorize(lambda value: int(value * denominator), otypes=[object])(support)
+    if not np.all(np.isfinite(support)) or not np.all(support == np.round(support)):
+        raise ValueError("Tryb dokładny wymaga całkowitej liczby głosów lub ułamków")
+    return support.astype(np.int64)
+
+
+def _mix(values):
+    # splitmix64 na tablicy uint64 (mnożenie modulo 2**64)
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def lot_draws(support, seed, rows=None):
+    # Losowanie (..., okręgi, komitety) z przedziału [0, 1) jako funkcja ziarna, numeru okręgu i wyników
+    # w okręgu - ten sam scenariusz daje ten sam wynik niezależnie od tego, w której paczce jest liczony
+    support = np.asarray(support)
+    if support.dtype == object:
+        bits = np.vectorize(lambda value: hash(value) & 0xFFFFFFFFFFFFFFFF, otypes=[np.uint64])(support)
+    elif support.dtype.kind == 'f':
+        bits = (support.astype(np.float64) + 0.0).view(np.uint64)  # + 0.0: -0.0 i 0.0 jednakowo
+    else:
+        bits = support.astype(np.int64).view(np.uint64)
+    if rows is None:
+        rows = np.arange(support.shape[-2])
+    state = _mix(np.full(support.shape[:-1], seed & 0xFFFFFFFFFFFFFFFF, dtype=np.uint64)
+                 ^ _mix(np.asarray(rows, dtype=np.uint64)))
+    for column in range(support.shape[-1]):
+        state = _mix(state ^ bits[..., column])
+    draws = _mix(state[..., None] ^ np.arange(1, support.shape[-1] + 1, dtype=np.uint64))
+    return (draws >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def tie_priority(support, tie_break, seed=None, rows=None):
+    # Pierwszeństwo przy remisie (..., komitety): mniejsza wartość wygrywa, przy równej - niższy indeks komitetu.
+    # "order" - kolejność komitetów, "votes" - więcej głosów w okręgu, "lot" - losowanie (lot_draws z ziarnem,
+    # osobno w każdym okręgu; rows - numery okręgów, gdy nie wszystkie), "votes_lot" - więcej głosów, a przy
+    # równej liczbie losowanie (jak w Kodeksie wyborczym), sekwencja - jawna kolejność pierwszeństwa komitetów
+    n_committees = support.shape[-1]
+    if isinstance(tie_break, str):
+        if tie_break == "order":
+            return np.zeros(support.shape, dtype=np.int64)
+        elif tie_break == "votes":
+            return -support
+        elif tie_break in ("lot", "votes_lot"):
+            if seed is None:
+                raise ValueError("Losowanie remisów wymaga ziarna")
+            draws = lot_draws(support, seed, rows)
+            if tie_break == "lot":
+                return draws
+            # Miejsce w okręgu według głosów, a między równymi liczbami głosów - według losowania
+            s_i, s_j = support[..., :, None], support[..., None, :]
+            ahead = (s_j > s_i) | ((s_j == s_i) & (draws[..., None, :] < draws[..., :, None]))
+            return ahead.sum(axis=-1)
+        raise ValueError("Nieznana reguła remisu: {}".format(tie_break))
+    priority = np.asarray(tie_break)
+    if priority.shape != (n_committees,):
+        raise ValueError("Kolejność pierwszeństwa musi mieć po jednej wartości dla każdego komitetu")
+    return np.broadcast_to(priority, support.shape)
+
+
+def tie_order(support, tie_break, seed=None, rows=None):
+    # Macierz (..., i, j): czy przy równych resztach komitet j ma pierwszeństwo przed i
+    earlier = np.tri(support.shape[-1], k=-1, dtype=bool)  # earlier[i, j]: j < i
+    priority = tie_priority(support, tie_break, seed, rows)
+    p_i = priority[..., :, None]
+    p_j = priority[..., None, :]
+    return (p_j < p_i) | ((p_j == p_i) & earlier)
+
+
+def allocate_divisor_heap(support, sizes, divisors):
+    # Jeden scenariusz (okręgi x komitety): w kopcu trzymamy tylko następny kwocjent każdego komitetu,
+    # więc okręg kosztuje O(size * log(komitety)) zamiast budowy pełnej macierzy kwocjentów.
+    # Remisy jak w allocate_divisor: najpierw niższy numer dzielnika, potem niższy indeks komitetu.
+    support = np.asarray(support, dtype=float)
+    sizes = np.asarray(sizes)
+    table = divisor_table(divisors, int(sizes.max(initial=0)) + 1).tolist()
+    mandates = np.zeros(support.shape, dtype=np.int64)
+    for row, (local, size) in enumerate(zip(support.tolist(), sizes.tolist())):
+        seats = [0] * len(local)
+        heap = [(-value / table[0], 0, i) for i, value in enumerate(local)]
+        heapq.heapify(heap)
+        for _ in range(size):
+            _, _, i = heapq.heappop(heap)
+            seats[i] += 1
+            heapq.heappush(heap, (-local[i] / table[seats[i]], seats[i], i))
+        mandates[row] = seats
+    return mandates
+
+
+def _compare_quotients(v_i, d_i, v_j, d_j):
+    # Kwocjenty v/sqrt(d) dla całkowitych głosów v i kwadratów dzielników d = (licznik, mianownik):
+    # mnożenie na krzyż na liczbach całkowitych. Zerowy dzielnik przy niezerowych głosach daje kwocjent
+    # nieskończony (jak ZERO_DIVISOR w wersji zmiennoprzecinkowej - między nimi decydują głosy)
+    infinite_i = d_i[0] == 0 and v_i > 0
+    infinite_j = d_j[0] == 0 and v_j > 0
+    if infinite_i or infinite_j:
+        if infinite_i and infinite_j:
+            return (v_i > v_j) - (v_i < v_j)
+        return 1 if infinite_i else -1
+    if d_i[0] == 0 or d_j[0] == 0:  # 0/0 - kwocjent zerowy
+        positive_i = d_i[0] != 0 and v_i > 0
+        positive_j = d_j[0] != 0 and v_j > 0
+        return positive_i - positive_j
+    left = v_i * v_i * d_j[0] * d_i[1]
+    right = v_j * v_j * d_i[0] * d_j[1]
+    return (left > right) - (left < right)
+
+
+def allocate_divisor_exact(votes, sizes, divisors, squared_divisors, tie_break="order", seed=None, rows=None):
+    # Metody dzielnikowe na całkowitych liczbach głosów. Kwocjenty zmiennoprzecinkowe wyznaczają tylko
+    # kandydatów wyraźnie powyżej granicy (pewne mandaty); kandydatów w pobliżu granicznego kwocjentu
+    # porządkujemy dokładnie (_compare_quotients), a równe kwocjenty rozstrzyga reguła tie_break.
+    votes = exact_votes(votes)
+    sizes = np.asarray(sizes)
+    n_committees = votes.shape[-1]
+    priority = tie_priority(votes, tie_break, seed, rows)
+    mandates = np.zeros(votes.shape, dtype=np.int64)
+    for size, idx in group_by_size(sizes):
+        local = votes[..., idx, :]
+        flat_votes = local.reshape(-1, n_committees)
+        row_priority = priority[..., idx, :].reshape(-1, n_committees)
+        quotients = flat_votes.astype(float)[:, None, :] / divisor_table(divisors, size)[:, None]
+        flat = quotients.reshape(flat_votes.shape[0], size * n_committees)
+        kth = np.partition(flat, flat.shape[1] - size, axis=-1)[:, flat.shape[1] - size, None]
+        near = (flat == kth) | (np.abs(flat - kth) <= EXACT_TOLERANCE * kth)
+        sure = (flat > kth) & ~near
+        selected = sure | near
+        unresolved = np.flatnonzero(near.sum(axis=-1) > size - sure.sum(axis=-1))
+        if unresolved.size:
+            squared = [(d.numerator, d.denominator) for d in squared_divisors(size)]
+            for row in unresolved.tolist():
+                values = flat_votes[row].tolist()
+                keys = row_priority[row].tolist()
+                candidates = np.flatnonzero(near[row]).tolist()
+
+                def compare(a, b):
+                    (k_a, i_a), (k_b, i_b) = divmod(a, n_committees), divmod(b, n_committees)
+                    order = _compare_quotients(values[i_a], squared[k_a], values[i_b], squared[k_b])
+                    if order:
+                        return -order
+                    # Równe kwocjenty: reguła remisu, potem indeks komitetu i numer dzielnika
+                    return (keys[i_a] > keys[i_b]) - (keys[i_a] < keys[i_b]) or i_a - i_b or k_a - k_b
+
+                free = size - int(sure[row].sum())
+                selected[row, candidates] = False
+                selected[row, sorted(candidates, key=cmp_to_key(compare))[:free]] = True
+        mandates[..., idx, :] = selected.reshape(quotients.shape).sum(axis=-2).reshape(local.shape)
+    return mandates
+
+
+def allocate_hare_niemeyer(support, sizes, exact=False, tie_break="order", seed=None, rows=None):
+    sizes = np.asarray(sizes)
+    if exact:
+        support = exact_votes(support)
+        if support.dtype != object and int(support.max(initial=0)) * int(sizes.max(initial=0)) >= 2 ** 62:
+            support = support.astype(object)  # Liczby Pythona zamiast int64, żeby iloczyn się nie przepełnił
+    else:
+        support = np.asarray(support, dtype=float)
+    n_committees = support.shape[-1]
+    positive = support > 0
+
+    if exact:
+        # Kwota komitetu to głosy * mandaty / suma głosów; reszty w okręgu mają wspólny mianownik,
+        # więc porównujemy same liczniki reszt - bez błędów zaokrągleń
+        total_support = np.where(positive, support, 0).sum(axis=-1)
+        numerators = np.where(positive, support, 0) * sizes[..., None]
+        denominators = np.maximum(total_support, 1)[..., None]
+        mandates = (numerators // denominators).astype(np.int64)
+        remainders = numerators % denominators
+    else:
+        # Sumujemy po kolei, żeby wynik zmiennoprzecinkowy był identyczny z sum() po liście
+        total_support = support[..., 0]
+        for i in range(1, n_committees):
+            total_support = total_support + support[..., i]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hare_quota = total_support / sizes
+            quotas = np.where(positive, support / hare_quota[..., None], 0.0)
+        mandates = np.trunc(quotas)
+        remainders = quotas - mandates
+        mandates = mandates.astype(np.int64)
+    remaining_mandates = sizes - mandates.sum(axis=-1)
+
+    # Pozycja reszty w rankingu malejącym; remisy rozstrzyga wybrana reguła
+    r_i = remainders[..., :, None]
+    r_j = remainders[..., None, :]
+    ahead = positive[..., None, :] & ((r_j > r_i) | ((r_j == r_i) & tie_order(support, tie_break, seed, rows)))
+    rank = ahead.sum(axis=-1)
+    mandates += positive & (rank < remaining_mandates[..., None])
+    return mandates
+
+
+def unchanged_after_party_change(support, mandates, party, new_party_support, sizes, divisors):
+    # Dla metod dzielnikowych: czy po zmianie poparcia jednej partii podział w okręgu zostaje ten sam.
+    # Wystarczy porównać kwocjenty tej partii z najsłabszym zwycięskim i najsilniejszym przegranym
+    # kwocjentem pozostałych partii. Remis traktujemy jako możliwą zmianę.
+    support = np.asarray(support, dtype=float)
+    sizes = np.asarray(sizes)
+    table = divisor_table(divisors, int(sizes.max()) + 1)
+    others = np.ones(support.shape[-1], dtype=bool)
+    others[party] = False
+
+    other_support = support[:, others]
+    other_mandates = mandates[:, others]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weakest_winner = np.where(
+            other_mandates > 0, other_support / table[np.maximum(other_mandates - 1, 0)], np.inf
+        ).min(axis=1, initial=np.inf)
+        strongest_loser = (other_support / table[other_mandates]).max(axis=1, initial=-np.inf)
+
+        seats = mandates[:, party]
+        keeps_last = (seats == 0) | (new_party_support / table[np.maximum(seats - 1, 0)] > strongest_loser)
+        gains_none = new_party_support / table[seats] < weakest_winner
+    return keeps_last & gains_none
+
+
+def _others_extreme(values, smallest):
+    # Dla każdego komitetu: najmniejsza (lub największa) wartość wśród pozostałych komitetów w okręgu
+    if values.shape[-1] == 1:
+        return np.full(values.shape, np.inf if smallest else -np.inf)
+    ordered = np.sort(values, axis=-1)
+    if smallest:
+        best, runner_up, index = ordered[..., :1], ordered[..., 1:2], values.argmin(axis=-1)
+    else:
+        best, runner_up, index = ordered[..., -1:], ordered[..., -2:-1], values.argmax(axis=-1)
+    own = np.arange(values.shape[-1]) == index[..., None]
+    return np.where(own, runner_up, best)
+
+
+def seat_margins(support, mandates, sizes, divisors):
+    # Dla metod dzielnikowych: o ile musi wzrosnąć poparcie komitetu w okręgu, żeby zdobył kolejny mandat,
+    # i o ile musi spaść, żeby stracił ostatni (przy niezmienionym poparciu pozostałych).
+    # Komitet zyskuje mandat, gdy jego następny kwocjent przekroczy najsłabszy zwycięski kwocjent pozostałych,
+    # a traci, gdy jego najsłabszy zwycięski kwocjent spadnie poniżej najsilniejszego przegranego pozostałych.
+    support = np.asarray(support, dtype=float)
+    mandates = np.asarray(mandates)
+    table = divisor_table(divisors, int(np.max(sizes)) + 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weakest_winner = np.where(mandates > 0, support / table[np.maximum(mandates - 1, 0)], np.inf)
+        strongest_loser = support / table[mandates]
+    others_winner = _others_extreme(weakest_winner, smallest=True)
+    others_loser = _others_extreme(strongest_loser, smallest=False)
+    gain = np.maximum(others_winner * table[mandates] - support, 0.0)
+    loss = np.where(mandates > 0, np.maximum(support - others_loser * table[np.maximum(mandates - 1, 0)], 0.0), np.inf)
+    return gain, loss
@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import types
+
+import numpy as np
+
+from models import Committee, default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator
+from coalitions import CoalitionEngine
+
+METHODS = ["dHondt", "SainteLague", "HareNiemeyer"]
+SUPPORT = [14.4, 8.6, 35.4, 7.2, 30.7]
+
+
+def measure(function, repeat=20, number=1, warmup=2):
+    # Czas jednego wywołania w nanosekundach: mediana i minimum z kilku powtórzeń
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter_ns() - start) / number)
+    return {'median_ns': statistics.median(samples), 'min_ns': min(samples), 'repeat': repeat, 'number': number}
+
+
+def calculator_benchmarks(data_path):
+    committees = default_committees()
+    constituencies = load_constituencies(data_path)
+    calculator = ElectionCalculator(committees, constituencies)
+    results = {}
+    for method in METHODS:
+        results[f'calculate_mandates[{method}]'] = measure(
+            lambda method=method: calculator.calculate_mandates(SUPPORT, method), number=20)
+    results['calculate_local_support'] = measure(
+        lambda: calculator.calculate_local_support(SUPPORT, constituencies[0]), number=200)
+    local_support = calculator.calculate_local_support(SUPPORT, constituencies[0])[:len(committees)]
+    results['_calculate_mandates_hereniemeyer'] = measure(
+        lambda: calculator._calculate_mandates_hereniemeyer(local_support, constituencies[0].size), number=200)
+
+    rng = np.random.default_rng(0)
+    supports = rng.uniform(0, 40, (20000, len(committees)))
+    for method in METHODS:
+        timing = measure(lambda method=method: calculator.calculate_mandates_batch(supports, method), repeat=5)
+        timing['scenarios_per_s'] = len(supports) / (timing['median_ns'] / 1e9)
+        results[f'calculate_mandates_batch[{method}]'] = timing
+    return results
+
+
+def coalition_committees(count):
+    # Syntetyczne komitety do badania skalowania wyszukiwania koalicji
+    base = default_committees()
+    extra = [Committee(f'k{i}', f'Komitet {i}', 5, []) for i in range(len(base), count)]
+    return (base + extra)[:count]
+
+
+def gui_benchmarks():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtCore import QByteArray
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    from gui import ElectionApp
+
+    window = ElectionApp()
+    # Wykresy i mapa powstają dopiero po rozgrzewce w tle (finish_startup) - obsługujemy zdarzenia, aż będą gotowe
+    deadline = time.perf_counter() + 60
+    while window.donut_chart is None:
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Okno nie zakończyło uruchamiania w 60 s")
+        app.processEvents()
+        time.sleep(0.01)
+    results = {}
+    window.calculator.calculate_mandates(SUPPORT)
+    constituency_results = [(list(c.support), list(c.mandates)) for c in window.constituencies]
+    winners = window.get_winners(constituency_results)
+
+    def color_map():
+        window.map_widget.load(QByteArray(window.color_map(winners)))
+    results['color_map'] = measure(color_map)
+
+    mandates = [sum(row[i] for _, row in constituency_results) for i in range(len(window.committees))]
+    window.results = {'national_support': SUPPORT, 'constituencies': constituency_results}
+    window.constituency_list.setCurrentRow(0)
+    donut_data = window.donut_chart_data(mandates)
+    bar_data = window.bar_chart_data(SUPPORT)
+
+    # Wymuszamy pełne rysowanie (draw), bo draw_idle tylko planuje odświeżenie
+    def donut():
+        window.show_donut_chart(donut_data)
+        window.donut_chart.canvas.draw()
+
+    def bar():
+        window.show_bar_chart(bar_data)
+        window.bar_chart.canvas.draw()
+
+    def constituency():
+        window.show_constituency_chart()
+        window.constituency_chart.canvas.draw()
+    results['chart[donut]'] = measure(donut)
+    results['chart[bar]'] = measure(bar)
+    results['chart[constituency]'] = measure(constituency)
+
+    for count in (5, 8, 10, 12, 15):
+        committees = coalition_committees(count)
+        owner = types.SimpleNamespace(committees=committees,
+                                      coalition_engine=CoalitionEngine([c.id for c in committees]))
+        seats = [460 // count] * count
+        support = [100 / count] * count
+        results[f'update_coalitions_widget[{count}]'] = measure(
+            lambda owner=owner, seats=seats, support=support: ElectionApp.build_coalitions_text(owner, seats, support),
+            repeat=5 if count > 10 else 20)
+        results[f'minimal_winning_coalitions[{count}]'] = measure(
+            lambda owner=owner, seats=seats: owner.coalition_engine.minimal_winning_coalitions(seats), number=20)
+    window.close()
+    app.processEvents()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Regresja: mediana wolniejsza od bazowej o więcej niż tolerance (np. 0.2 = 20%)
+    regressions = []
+    for name, timing in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        ratio = timing['median_ns'] / reference['median_ns']
+        status = 'REGRESSION' if ratio > 1 + tolerance else 'ok'
+        print(f"{name:45s} {timing['median_ns'] / 1e6:10.3f} ms  x{ratio:5.2f}  {status}")
+        if status != 'ok':
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Testy wydajności kalkulatora, mapy, wykresów i koalicji")
+    parser.add_argument('-o', '--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="plik JSON z poprzednim wynikiem do porównania")
+    parser.add_argument('--save-baseline', help="zapisz wynik także jako nowy plik bazowy")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--no-gui', action='store_true', help="pomiń pomiary wymagające Qt")
+    parser.add_argument('--data', default='wybory2023.csv')
+    args = parser.parse_args(argv)
+
+    results = calculator_benchmarks(args.data)
+    if not args.no_gui:
+        results.update(gui_benchmarks())
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+    else:
+        for name, timing in results.items():
+            print(f"{name:45s} {timing['median_ns'] / 1e6:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+
+class SeatResultCache:
+    def __init__(self, maxsize=1024, decimals=2):
+        self.maxsize = maxsize
+        self.decimals = decimals  # Pola poparcia w GUI mają 2 miejsca po przecinku
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, support, thresholds, method):
+        return tuple(round(float(s), self.decimals) for s in support), tuple(thresholds), method
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)  # Usuwamy najdawniej używany wynik
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,115 +1,416 @@
-from models import Committee, Constituency
+from models import Committee, Constituency, ConstituencySet
+from allocation import (
+    DIVISOR_METHODS, EXACT_DIVISORS, allocate_divisor, allocate_divisor_exact, allocate_divisor_heap,
+    allocate_hare_niemeyer, seat_margins, unchanged_after_party_change
+)
 import math
+import numpy as np
+
+# Poprawki lokalne liczone raz razem z macierzą odchyleń:
+# poparcie spoza listy komitetów dopisywane do wyników okręgu (MN w Opolu)
+EXTRA_LOCAL_SUPPORT = {21: [5.37]}
+# maksymalne poparcie lokalne jako wielokrotność krajowego: (numer okręgu, komitet) -> mnożnik
+LOCAL_SUPPORT_CAPS = {(32, 'nl'): 1.8}
+
+
+def available_methods():
+    # Metody dzielnikowe z rejestru oraz metoda Hare'a-Niemeyera
+    return list(DIVISOR_METHODS) + ["HareNiemeyer"]
+
+
+class MandatesDiff:
+    def __init__(self, mandates, previous_mandates, changed_constituencies, recomputed_constituencies):
+        self.mandates = mandates
+        self.previous_mandates = previous_mandates
+        self.changed_constituencies = changed_constituencies  # indeksy okręgów, w których zmienił się podział
+        self.recomputed_constituencies = recomputed_constituencies  # ile okręgów faktycznie przeliczono
+
+    @property
+    def changed_committees(self):
+        if self.previous_mandates is None:
+            return {i: (None, m) for i, m in enumerate(self.mandates)}
+        return {
+            i: (old, new) for i, (old, new) in enumerate(zip(self.previous_mandates, self.mandates)) if old != new
+        }
+
+    @property
+    def national_changed(self):
+        return self.previous_mandates != self.mandates
+
+class SeatMargins:
+    def __init__(self, mandates, gain_local, loss_local, gain_national, loss_national):
+        # Tablice okręgi x komitety w punktach procentowych; np.inf oznacza, że zmiana mandatu w okręgu
+        # nie jest możliwa (np. komitet pod progiem albo bez mandatów do stracenia)
+        self.mandates = mandates
+        self.gain_local = gain_local
+        self.loss_local = loss_local
+        self.gain_national = gain_national
+        self.loss_national = loss_national
+
+    def closest(self, constituencies, committees, count=10):
+        # Najbliższe zmiany mandatów: (numer okręgu, id komitetu, 'zysk'/'strata', margines krajowy, lokalny)
+        rows = []
+        for kind, national, local in (('zysk', self.gain_national, self.gain_local),
+                                      ('strata', self.loss_national, self.loss_local)):
+            for row, column in zip(*np.nonzero(np.isfinite(national))):
+                rows.append((constituencies[row].number, committees[column].id, kind,
+                             float(national[row, column]), float(local[row, column])))
+        rows.sort(key=lambda x: x[3])
+        return rows[:count]
 
 class ElectionCalculator:
-    def __init__(self, committees, constituencies):
+    def __init__(self, committees, constituencies, cache=None, tie_break="order", projection=None, exact=False,
+                 valid_votes=None, seed=0):
         self.committees = committees
         self.constituencies = constituencies
+        self.cache = cache
+        # Rozstrzyganie remisów: równych reszt w metodzie Hare'a-Niemeyera, a w trybie dokładnym także
+        # równych kwocjentów (allocation.TIE_BREAKS albo jawna kolejność komitetów - allocation.tie_priority)
+        self.tie_break = tie_break
+        # Tryb dokładny: podział na całkowitych liczbach głosów - poparcie lokalne razy liczba głosów ważnych
+        # w okręgu (valid_votes, domyślnie z danych okręgów), porównania kwocjentów na liczbach całkowitych
+        self.exact = exact
+        self.valid_votes = valid_votes
+        self.seed = seed  # Ziarno losowania remisów ("lot", "votes_lot"): ten sam scenariusz - ten sam wynik
+        # Opcjonalny model przenoszenia poparcia na okręgi z metodą local_support_matrix(supports),
+        # np. MunicipalityModel; domyślnie odchylenia okręgów z poprawkami z tego modułu
+        self.projection = projection
         self.pastSupport = self.calculate_past_support()
+        self._projection_key = None
+        self._deviation = None
+        self._caps = None
+        self._sizes = None
+        self._extra_support = None
+        self._last_state = None
 
     def calculate_past_support(self):
+        if isinstance(self.constituencies, ConstituencySet):
+            sizes = self.constituencies.sizes
+            if not len(sizes):
+                return {}
+            # Sumowanie kolejno po okręgach (cumsum), jak w pętli poniżej - identyczne zaokrąglenia
+            weighted = self.constituencies.past_support * sizes[:, None]
+            totals = np.cumsum(weighted, axis=0)[-1] / sizes.sum()
+            return dict(zip(self.constituencies.parties, totals.tolist()))
         total_mandates = sum(c.size for c in self.constituencies)
         pastSupport = {}
-        for party in ['td', 'nl', 'pis', 'konf', 'ko']:
+        parties = self.constituencies[0].pastSupport if self.constituencies else []
+        for party in parties:  # Wszystkie komitety z danych historycznych
             total_support = sum(c.pastSupport[party] * c.size for c in self.constituencies)
             pastSupport[party] = total_support / total_mandates
         return pastSupport
 
-    def calculate_local_support(self, support, constituency):
-        past_support_projection = [
-            self.pastSupport.get(committee.id, 0) for committee in self.committees
-        ]
-        local_past_support = constituency.pastSupport
-        local_past_support_projection = [
-            local_past_support.get(committee.id, 0) for committee in self.committees
-        ]
-        local_support_deviation = [
-            local / proj if proj != 0 else 0
-            for local, proj in zip(local_past_support_projection, past_support_projection)
-        ]
-        local_support = [s * dev for s, dev in zip(support, local_support_deviation)]
-        if constituency.number == 21:  # Zachowujemy wsparcie dla MN w Opolu
-            local_support.append(5.37)
-        if constituency.number == 32:
+    def invalidate_projection(self):
+        self._projection_key = None
+
+    def _build_projection(self):
+        # Macierz odchyleń zależy tylko od danych historycznych i listy komitetów
+        if isinstance(self.constituencies, ConstituencySet):
+            constituencies_key = id(self.constituencies)
+        else:
+            constituencies_key = tuple(id(c) for c in self.constituencies)
+        key = (tuple(c.id for c in self.committees), constituencies_key)
+        if key == self._projection_key:
+            return
+        if self._projection_key is not None and key[1] != self._projection_key[1]:
+            self.pastSupport = self.calculate_past_support()
+        if self.cache is not None:
+            self.cache.clear()
+        self._deviation = self.local_support_deviation()
+
+        if isinstance(self.constituencies, ConstituencySet):
+            numbers = self.constituencies.numbers.tolist()
+        else:
+            numbers = [c.number for c in self.constituencies]
+        rows, columns, factors = [], [], []
+        for row, number in enumerate(numbers):
             for i, committee in enumerate(self.committees):
-                if committee.id == 'nl':
-                    cap = 1.8 * support[i]
-                    if local_support[i] > cap:
-                        local_support[i] = cap
-                    break
-        return local_support
-
-    def calculate_mandates(self, support, method="dHondt"):
-        mandates = [0] * len(self.committees)
-        for constituency in self.constituencies:
-            local_support = self.calculate_local_support(support, constituency)
-            constituency.support = local_support
-            constituency.mandates = [0] * len(self.committees)  # Inicjalizacja mandatów dla poszczególnych komitetów
-            filtered_local_support = [
-                0 if support[i] < self.committees[i].threshold else local_support[i]
-                for i in range(len(self.committees))
-            ]
-
-            # Wybieramy odpowiednią metodę kalkulacji kwocjentów
-            if method == "dHondt" or method == "SainteLague":
-                if method == "dHondt":
-                    quotients = self._calculate_quotients_dhondt(filtered_local_support, constituency.size)
-                else:
-                    quotients = self._calculate_quotients_saintelague(filtered_local_support, constituency.size)
-                quotients.sort(key=lambda x: x['quotient'], reverse=True)
-                top_quotients = quotients[:constituency.size]
-                for quotient in top_quotients:
-                    mandates[quotient['committeeIndex']] += 1
-                    constituency.mandates[quotient['committeeIndex']] += 1
-            elif method == "HareNiemeyer":
-                committee_mandates = self._calculate_mandates_hereniemeyer(filtered_local_support, constituency.size)
-                for i, committee_mandate in enumerate(committee_mandates):
-                    mandates[i] += committee_mandate
-                    constituency.mandates[i] += committee_mandate
+                factor = LOCAL_SUPPORT_CAPS.get((number, committee.id))
+                if factor is not None:
+                    rows.append(row)
+                    columns.append(i)
+                    factors.append(factor)
+        self._caps = (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp), np.array(factors))
+
+        if isinstance(self.constituencies, ConstituencySet):
+            self._sizes = self.constituencies.sizes
+        else:
+            self._sizes = np.array([c.size for c in self.constituencies])
+        if self.projection is None:
+            self._extra_support = [EXTRA_LOCAL_SUPPORT.get(number, []) for number in numbers]
+        else:
+            self._extra_support = [[] for _ in numbers]  # Model jednostek uwzględnia je w danych
+        self._projection_key = key
+        self._last_state = None
+
+    def local_support_deviation(self):
+        # Okręgi x komitety: lokalny wynik z przeszłości względem krajowego
+        past = np.array([self.pastSupport.get(committee.id, 0) for committee in self.committees], dtype=float)
+        if isinstance(self.constituencies, ConstituencySet):
+            local = self.constituencies.past_support_matrix([committee.id for committee in self.committees])
+        else:
+            local = np.array([
+                [constituency.pastSupport.get(committee.id, 0) for committee in self.committees]
+                for constituency in self.constituencies
+            ], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(past != 0, local / past, 0.0)
+
+    def local_support_matrix(self, supports):
+        self._build_projection()
+        if self.projection is not None:
+            return self.projection.local_support_matrix(supports)
+        supports = np.asarray(supports, dtype=float)
+        local_matrix = supports[..., None, :] * self._deviation
+        rows, columns, factors = self._caps
+        if rows.size:
+            local_matrix[..., rows, columns] = np.minimum(
+                local_matrix[..., rows, columns], factors * supports[..., columns]
+            )
+        return local_matrix
+
+    def local_supports(self, support):
+        # Poparcie lokalne w każdym okręgu razem z poparciem spoza listy komitetów
+        local_matrix = self.local_support_matrix(support)
+        return [local + extra for local, extra in zip(local_matrix.tolist(), self._extra_support)]
+
+    def calculate_local_support(self, support, constituency):
+        row = self.constituencies.index(constituency)
+        return self.local_support_matrix(support)[row].tolist() + self._extra_support[row]
+
+    def thresholds(self, thresholds=None):
+        # Progi odczytane raz na przeliczenie: ten sam zestaw trafia do klucza pamięci podręcznej i do
+        # odfiltrowania komitetów, nawet gdy wątek GUI zmienia progi w trakcie liczenia
+        if thresholds is None:
+            thresholds = [committee.threshold for committee in self.committees]
+        return tuple(thresholds)
+
+    def calculate_mandates(self, support, method="dHondt", thresholds=None):
+        self._build_projection()
+        self._last_state = None  # Pełne przeliczenie nadpisuje stan okręgów, więc kolejne przyrostowe liczy od zera
+        thresholds = self.thresholds(thresholds)
+        if self.cache is None:
+            entry = self._compute_mandates(support, method, thresholds)
+        else:
+            key = self.cache.key(support, thresholds, method)
+            entry = self.cache.get(key)
+            if entry is None:
+                # Liczymy na zaokrąglonym wektorze, żeby wynik z pamięci podręcznej był identyczny ze świeżym
+                entry = self._compute_mandates(list(key[0]), method, thresholds)
+                self.cache.put(key, entry)
+
+        mandates, local_matrix, constituency_mandates = entry
+        self.store_results(local_matrix, constituency_mandates)
+        return list(mandates)
+
+    def _compute_mandates(self, support, method, thresholds=None):
+        local_matrix = self.local_support_matrix(support)
+        constituency_mandates = self.allocate(self.apply_thresholds(support, local_matrix, thresholds), method)
+        return self._cache_entry(local_matrix, constituency_mandates)
+
+    def _cache_entry(self, local_matrix, constituency_mandates):
+        # Tablice tylko do odczytu zamiast krotek krotek: mniej pamięci na wpis i szybki zapis do buforów
+        # ConstituencySet; poparcie spoza listy komitetów jest stałe, więc dokładamy je przy zapisie
+        local_matrix = np.array(local_matrix)
+        constituency_mandates = np.array(constituency_mandates)
+        local_matrix.setflags(write=False)
+        constituency_mandates.setflags(write=False)
+        return tuple(constituency_mandates.sum(axis=0).tolist()), local_matrix, constituency_mandates
+
+    def store_results(self, local_matrix, constituency_mandates, rows=None):
+        # Wyniki przeliczenia w okręgach: w ConstituencySet - zapis do buforów bez tworzenia list,
+        # w zwykłej liście okręgów - listy w atrybutach support/mandates; rows - tylko wybrane okręgi
+        if isinstance(self.constituencies, ConstituencySet):
+            self.constituencies.store(local_matrix, constituency_mandates, rows, self._extra_support)
+            return
+        for constituency, local_support, extra_support in zip(
+                self.constituencies, np.asarray(local_matrix).tolist(), self._extra_support):
+            constituency.support = local_support + extra_support
+        if rows is None:
+            rows = range(len(self.constituencies))
+        for index in rows:
+            self.constituencies[index].mandates = constituency_mandates[index].tolist()
+
+    def calculate_mandates_incremental(self, support, method="dHondt", thresholds=None):
+        # Przelicza tylko okręgi, w których zmiana może przesunąć mandat, i zwraca różnicę względem poprzedniego wyniku
+        self._build_projection()
+        thresholds = self.thresholds(thresholds)
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(support, thresholds, method)
+            support = list(key[0])
+            cached = self.cache.get(key)
+        local_matrix = self.local_support_matrix(support)
+        filtered = self.apply_thresholds(support, local_matrix, thresholds)
+        sizes = self.constituency_sizes()
+        previous = self._last_state
+
+        if cached is not None:
+            constituency_mandates = cached[2].copy()
+            recompute = np.ones(len(self.constituencies), dtype=bool)
+        elif previous is None or previous['method'] != method:
+            constituency_mandates = self.allocate(filtered, method)
+            recompute = np.ones(len(self.constituencies), dtype=bool)
+        else:
+            constituency_mandates = previous['constituency_mandates'].copy()
+            changed_columns = np.flatnonzero((filtered != previous['filtered']).any(axis=0))
+            if changed_columns.size == 0:
+                recompute = np.zeros(len(self.constituencies), dtype=bool)
+            # W trybie dokładnym zaokrąglenie do całych głosów może przesunąć granicę - liczymy wszystkie okręgi
+            elif changed_columns.size == 1 and method in DIVISOR_METHODS and not self.exact:
+                party = changed_columns[0]
+                recompute = ~unchanged_after_party_change(
+                    previous['filtered'], constituency_mandates, party, filtered[:, party],
+                    sizes, DIVISOR_METHODS[method]
+                )
             else:
-                raise ValueError("Nieznana metoda: {}".format(method))
+                recompute = np.ones(len(self.constituencies), dtype=bool)
+            if recompute.any():
+                constituency_mandates[recompute] = self.allocate(
+                    filtered[recompute], method, sizes[recompute], np.flatnonzero(recompute)
+                )
+        if self.cache is not None and cached is None:
+            self.cache.put(key, self._cache_entry(local_matrix, constituency_mandates))
 
-        return mandates
+        changed = recompute.copy()
+        if previous is not None:
+            changed &= (constituency_mandates != previous['constituency_mandates']).any(axis=1)
+        self._last_state = {
+            'method': method,
+            'filtered': filtered,
+            'constituency_mandates': constituency_mandates,
+        }
 
-    def _calculate_quotients_dhondt(self, support, size):
-        quotients = []
-        for divisor in range(1, size + 1):
-            for committee_index in range(len(self.committees)):
-                quotient = support[committee_index] / divisor
-                quotients.append({'quotient': quotient, 'committeeIndex': committee_index})
-        return quotients
-
-    def _calculate_quotients_saintelague(self, support, size):
-        quotients = []
-        for i in range(1, size + 1):
-            divisor = 2 * i - 1  # Dzielniki: 1, 3, 5, ...
-            for committee_index in range(len(self.committees)):
-                quotient = support[committee_index] / divisor
-                quotients.append({'quotient': quotient, 'committeeIndex': committee_index})
-        return quotients
+        self.store_results(local_matrix, constituency_mandates, np.flatnonzero(recompute))
 
-    def _calculate_mandates_hereniemeyer(self, support, size):
-        total_support = sum(support)
-        mandates = [0] * len(self.committees)
-        hare_quota = total_support / size
-        remainders = []
-        remaining_mandates = size
-
-        for i in range(len(self.committees)):
-            if support[i] > 0:
-                committee_mandates = int(support[i] / hare_quota)
-                mandates[i] = committee_mandates
-                remaining_mandates -= committee_mandates
-
-                remainder = (support[i] / hare_quota) - committee_mandates
-                remainders.append((i, remainder))
-        remainders.sort(key=lambda x: x[1], reverse=True)
-
-        for i in range(remaining_mandates):
-            if i < len(remainders):
-                committee_index = remainders[i][0]
-                mandates[committee_index] += 1
+        return MandatesDiff(
+            constituency_mandates.sum(axis=0).tolist(),
+            None if previous is None else previous['constituency_mandates'].sum(axis=0).tolist(),
+            np.flatnonzero(changed).tolist(),
+            int(recompute.sum()),
+        )
+
+    def apply_precomputed(self, support, constituency_mandates, method="dHondt", thresholds=None):
+        # Gotowy podział (np. odczyt z krzywej mandatów) zapisany do okręgów razem ze stanem przyrostowym,
+        # żeby kolejne calculate_mandates_incremental liczyło różnicę względem tego wyniku
+        self._build_projection()
+        local_matrix = self.local_support_matrix(support)
+        constituency_mandates = np.array(constituency_mandates, dtype=np.int64)
+        self._last_state = {
+            'method': method,
+            'filtered': self.apply_thresholds(support, local_matrix, thresholds),
+            'constituency_mandates': constituency_mandates,
+        }
+        self.store_results(local_matrix, constituency_mandates)
+        return constituency_mandates.sum(axis=0).tolist()
 
+    def support_slopes(self, support=None, step=0.01):
+        # Okręgi x komitety: przyrost poparcia lokalnego na punkt poparcia krajowego - odchylenie okręgu,
+        # a tam, gdzie działa limit z LOCAL_SUPPORT_CAPS, mnożnik limitu
+        self._build_projection()
+        if self.projection is not None:
+            # Model nieliniowy: pochodna w punkcie `support` z różnic centralnych
+            support = np.asarray(support, dtype=float)
+            shifts = np.eye(support.size) * step
+            upper = self.local_support_matrix(support + shifts)
+            lower = self.local_support_matrix(np.maximum(support - shifts, 0.0))
+            width = (support + step) - np.maximum(support - step, 0.0)
+            return np.stack([(upper[k, :, k] - lower[k, :, k]) / width[k] for k in range(support.size)], axis=1)
+        slopes = self._deviation.copy()
+        rows, columns, factors = self._caps
+        if rows.size:
+            capped = slopes[rows, columns] > factors
+            slopes[rows[capped], columns[capped]] = factors[capped]
+        return slopes
+
+    def seat_margins(self, support, method="dHondt"):
+        # Marginesy ostatniego mandatu w każdym okręgu w jednym przebiegu, bez ponownego liczenia podziału
+        if method not in DIVISOR_METHODS:
+            raise ValueError("Marginesy mandatów są dostępne tylko dla metod dzielnikowych: {}".format(method))
+        support = np.asarray(support, dtype=float)
+        local_matrix = self.local_support_matrix(support)
+        filtered = self.apply_thresholds(support, local_matrix)
+        sizes = self.constituency_sizes()
+        mandates = self.allocate(filtered, method)
+        gain_local, loss_local = seat_margins(filtered, mandates, sizes, DIVISOR_METHODS[method])
+
+        # Komitet pod progiem nie zdobędzie mandatu samą zmianą poparcia w okręgu
+        thresholds = np.array([committee.threshold for committee in self.committees], dtype=float)
+        gain_local[:, support < thresholds] = np.inf
+
+        slope = self.support_slopes(support)
+        with np.errstate(divide='ignore'):
+            gain_national = np.where(slope > 0, gain_local / slope, np.inf)
+            loss_national = np.where(slope > 0, loss_local / slope, np.inf)
+        # Spadek pod próg odbiera wszystkie mandaty, więc krajowo strata może nastąpić wcześniej
+        below_threshold = np.where(mandates > 0, support - thresholds, np.inf)
+        loss_national = np.minimum(loss_national, below_threshold)
+        return SeatMargins(mandates, gain_local, loss_local, gain_national, loss_national)
+
+    def calculate_mandates_batch(self, supports, method="dHondt", per_constituency=False, chunk_size=512):
+        # supports: N x komitety; nie zmienia stanu obiektów Constituency
+        supports = np.atleast_2d(np.asarray(supports, dtype=float))
+        mandates = np.zeros(supports.shape, dtype=np.int64)
+        if per_constituency:
+            constituency_mandates = np.zeros(
+                (supports.shape[0], len(self.constituencies), supports.shape[1]), dtype=np.int64
+            )
+        for start in range(0, supports.shape[0], chunk_size):  # Paczki ograniczają zużycie pamięci
+            chunk = supports[start:start + chunk_size]
+            local_matrix = self.local_support_matrix(chunk)
+            chunk_mandates = self.allocate(self.apply_thresholds(chunk, local_matrix), method)
+            mandates[start:start + chunk_size] = chunk_mandates.sum(axis=-2)
+            if per_constituency:
+                constituency_mandates[start:start + chunk_size] = chunk_mandates
+        if per_constituency:
+            return mandates, constituency_mandates
         return mandates
 
+    def apply_thresholds(self, support, local_matrix, thresholds=None):
+        thresholds = np.array(self.thresholds(thresholds), dtype=float)
+        below = np.asarray(support, dtype=float) < thresholds
+        return np.where(below[..., None, :], 0.0, local_matrix)
+
+    def vote_counts(self, filtered_local_support, rows=None):
+        # Całkowite liczby głosów z poparcia lokalnego (%) i liczby głosów ważnych w okręgach
+        valid_votes = self.valid_votes
+        if valid_votes is None:
+            valid_votes = getattr(self.constituencies, 'valid_votes', None)
+        if valid_votes is None:
+            raise ValueError("Tryb dokładny wymaga liczby głosów ważnych w okręgach")
+        valid_votes = np.asarray(valid_votes, dtype=float)
+        if rows is not None:
+            valid_votes = valid_votes[rows]
+        return np.rint(np.asarray(filtered_local_support, dtype=float) * valid_votes[:, None] / 100).astype(np.int64)
 
+    def allocate(self, filtered_local_support, method, sizes=None, rows=None):
+        # Wybieramy odpowiednią metodę podziału mandatów; rows - okręgi, których dotyczą wiersze (gdy nie wszystkie)
+        if sizes is None:
+            sizes = self.constituency_sizes()
+        if self.exact:
+            votes = self.vote_counts(filtered_local_support, rows)
+            if method in DIVISOR_METHODS:
+                return allocate_divisor_exact(
+                    votes, sizes, DIVISOR_METHODS[method], EXACT_DIVISORS[method], self.tie_break, self.seed, rows
+                )
+            elif method == "HareNiemeyer":
+                return allocate_hare_niemeyer(votes, sizes, exact=True, tie_break=self.tie_break, seed=self.seed,
+                                              rows=rows)
+            raise ValueError("Nieznana metoda: {}".format(method))
+        if method in DIVISOR_METHODS:
+            if np.ndim(filtered_local_support) == 2:
+                # Pojedynczy scenariusz: kopiec zamiast pełnej macierzy kwocjentów
+                return allocate_divisor_heap(filtered_local_support, sizes, DIVISOR_METHODS[method])
+            return allocate_divisor(filtered_local_support, sizes, DIVISOR_METHODS[method])
+        elif method == "HareNiemeyer":
+            return allocate_hare_niemeyer(filtered_local_support, sizes, tie_break=self.tie_break, seed=self.seed,
+                                          rows=rows)
+        else:
+            raise ValueError("Nieznana metoda: {}".format(method))
+
+    def constituency_sizes(self):
+        self._build_projection()
+        return self._sizes
+
+    def _calculate_mandates_hereniemeyer(self, support, size):
+        return allocate_hare_niemeyer([support], [size], tie_break=self.tie_break, seed=self.seed)[0].tolist()
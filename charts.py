@@ -0,0 +1,145 @@
+import math
+
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle, Wedge
+from matplotlib.ticker import MaxNLocator
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+# Wykresy tworzymy raz, a przy przeliczeniu zmieniamy tylko właściwości istniejących obiektów
+# i zlecamy odświeżenie przez draw_idle (kolejne żądania w tej samej klatce są łączone).
+
+
+def warm_up():
+    # Pierwsze rysowanie jest najwolniejsze (czcionki, układ tekstu); rysujemy próbny wykres poza ekranem,
+    # co można zrobić w wątku roboczym - Figure z płótnem Agg nie jest związana z Qt
+    figure = Figure(figsize=(2, 2))
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(1, 1, 1)
+    ax.bar([0, 1], [1, 2])
+    ax.set_title("Okręg 0 - Mandaty")
+    ax.annotate("0.0%", xy=(0, 1), xytext=(0, 3), textcoords="offset points", fontsize=9)
+    ax.add_patch(Wedge((0, 0), 1, 0, 90))
+    canvas.draw()
+
+
+class DonutChart:
+    def __init__(self, slots):
+        # slots: maksymalna liczba wycinków (komitety + biała połowa)
+        self.figure = Figure(figsize=(8, 6), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.ax.set_position([-0.025, -0.25, 1.1, 1.0])
+        self.figure.suptitle("Podział mandatów", y=0.9, fontsize=14)
+
+        self.wedges = []
+        self.labels = []
+        for _ in range(slots):
+            wedge = Wedge((0, 0), 1, 0, 0, clip_on=False, visible=False)
+            self.ax.add_patch(wedge)
+            self.wedges.append(wedge)
+            label = self.ax.text(0, 0, "", va='center', fontsize=mpl.rcParams['xtick.labelsize'], visible=False)
+            self.labels.append(label)
+        self.ax.add_artist(Circle((0, 0), 0.6, color='white'))
+        # Zakres danych pełnego koła, jak po Axes.pie, żeby axis('equal') dało tę samą skalę
+        self.ax.update_datalim([(-1, -1), (1, 1)])
+        self.ax.set(frame_on=False, xticks=[], yticks=[])
+        self.ax.axis('equal')
+
+    def update(self, data, labels, colors):
+        # Te same kąty i położenie etykiet co w Axes.pie (start od 0°, przeciwnie do ruchu wskazówek zegara)
+        total = sum(data)
+        theta1 = 0.0
+        for i, (wedge, label) in enumerate(zip(self.wedges, self.labels)):
+            if i >= len(data) or total <= 0:
+                wedge.set_visible(False)
+                label.set_visible(False)
+                continue
+            theta2 = theta1 + data[i] / total
+            wedge.set_theta1(360.0 * theta1)
+            wedge.set_theta2(360.0 * theta2)
+            wedge.set_facecolor(colors[i])
+            wedge.set_visible(True)
+
+            thetam = math.pi * (theta1 + theta2)
+            x, y = 1.1 * math.cos(thetam), 1.1 * math.sin(thetam)
+            label.set_position((x, y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            label.set_text(labels[i])
+            label.set_visible(bool(labels[i]))
+            theta1 = theta2
+        self.canvas.draw_idle()
+
+
+class SupportBarChart:
+    def __init__(self, bars):
+        self.figure = Figure(figsize=(6, 5))
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.ax.set_ylabel("Poparcie (%)")
+        self.ax.set_title("Poparcie krajowe partii")
+        positions = list(range(bars))
+        self.bars = self.ax.bar(positions, [0] * bars)
+        self.ax.set_xticks(positions)
+        self.annotations = [
+            self.ax.annotate("", xy=(bar.get_x() + bar.get_width() / 2, 0),
+                             xytext=(0, 3), textcoords="offset points",
+                             ha='center', va='bottom', fontsize=9)
+            for bar in self.bars
+        ]
+
+    def update(self, support, party_names, colors):
+        for bar, annotation, height, color in zip(self.bars, self.annotations, support, colors):
+            bar.set_height(height)
+            bar.set_color(color)
+            annotation.xy = (bar.get_x() + bar.get_width() / 2, height)
+            annotation.set_text(f'{height:.1f}%')
+        self.ax.set_xticklabels(party_names)
+
+        max_support = max(support) if max(support) > 0 else 100
+        self.ax.set_ylim(0, max_support * 1.1)
+        self.canvas.draw_idle()
+
+
+class ConstituencyChart:
+    def __init__(self, bars):
+        self.figure = Figure(figsize=(6, 4))
+        self.canvas = FigureCanvas(self.figure)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.ax.set_ylabel("Liczba mandatów")
+        self.ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        self.ax.tick_params(axis='x', labelsize=12)
+        self.title = self.ax.set_title("Okręg 0 - Mandaty")  # Tekst zastępczy, żeby tight_layout zostawił miejsce
+        self.bars = self.ax.bar(list(range(bars)), [0] * bars)
+        self.ax.set_xticks(list(range(bars)))
+        self.ax.set_xticklabels(["PiS"] * bars)
+        self.ax.set_ylim(0, 10)
+        self.annotations = [
+            self.ax.annotate("", xy=(bar.get_x() + bar.get_width() / 2, 0),
+                             xytext=(0, 3), textcoords="offset points",
+                             ha='center', va='bottom')
+            for bar in self.bars
+        ]
+        self.figure.tight_layout()
+
+    def update(self, number, party_names, mandates, colors):
+        for i, (bar, annotation) in enumerate(zip(self.bars, self.annotations)):
+            visible = i < len(mandates)
+            bar.set_visible(visible)
+            annotation.set_visible(visible)
+            if visible:
+                bar.set_height(mandates[i])
+                bar.set_color(colors[i])
+                annotation.xy = (bar.get_x() + bar.get_width() / 2, mandates[i])
+                annotation.set_text(f'{int(mandates[i])}')
+
+        # Zakres osi X jak przy autoskalowaniu wykresu kategorii (marginesy 5%)
+        n = len(mandates)
+        margin = 0.05 * (n - 0.2)
+        self.ax.set_xlim(-0.4 - margin, n - 0.6 + margin)
+        self.ax.set_xticks(list(range(n)))
+        self.ax.set_xticklabels(party_names)
+        self.ax.set_ylim(0, max(mandates) + 1)
+        self.title.set_text(f"Okręg {number} - Mandaty")
+        self.canvas.draw_idle()
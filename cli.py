@@ -0,0 +1,186 @@
+import argparse
+import csv
+import json
+import sys
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator, available_methods
+from allocation import TIE_BREAKS
+from municipal_model import MunicipalityModel
+
+METHODS = available_methods()
+
+
+def parse_thresholds(values, committees):
+    # Format: id=próg, np. td=8
+    thresholds = {}
+    ids = {committee.id for committee in committees}
+    for value in values or []:
+        committee_id, _, threshold = value.partition('=')
+        if committee_id not in ids or not threshold:
+            raise ValueError("Niepoprawny próg: {}".format(value))
+        thresholds[committee_id] = float(threshold.replace(',', '.'))
+    return thresholds
+
+
+def read_scenarios(stream, input_format, committees):
+    # Zwraca kolejno słowniki: id, support (lista w kolejności komitetów), opcjonalnie method i thresholds
+    ids = [committee.id for committee in committees]
+    if input_format == 'csv':
+        # Pliki z danymi wyborczymi używają średnika; separator rozpoznajemy po nagłówku
+        header = stream.readline().lstrip('\ufeff')
+        delimiter = ';' if header.count(';') > header.count(',') else ','
+        fieldnames = next(csv.reader([header], delimiter=delimiter))
+        reader = csv.DictReader(stream, fieldnames=fieldnames, delimiter=delimiter)
+        for number, row in enumerate(reader):
+            yield {
+                'id': row.get('id') or str(number),
+                'support': [float(row[committee_id].replace(',', '.')) for committee_id in ids],
+                'method': row.get('method') or None,
+                'thresholds': {},
+            }
+    else:
+        for number, line in enumerate(stream):
+            line = line.strip()
+            if not line:
+                continue
+            yield parse_scenario(json.loads(line), number, committees)
+
+
+def parse_scenario(row, number, committees):
+    # Scenariusz z obiektu JSON: poparcie jako lista w kolejności komitetów albo słownik id -> poparcie
+    ids = [committee.id for committee in committees]
+    support = row['support']
+    if isinstance(support, dict):
+        support = [float(support.get(committee_id, 0.0)) for committee_id in ids]
+    elif len(support) != len(ids):
+        raise ValueError("Niepoprawna liczba wartości poparcia: {}".format(len(support)))
+    return {
+        'id': str(row.get('id', number)),
+        'support': [float(s) for s in support],
+        'method': row.get('method'),
+        'thresholds': row.get('thresholds', {}),
+    }
+
+
+class ResultWriter:
+    def __init__(self, stream, output_format, committees, constituencies, per_constituency, header=True):
+        self.stream = stream
+        self.output_format = output_format
+        self.ids = [committee.id for committee in committees]
+        self.numbers = [constituency.number for constituency in constituencies]
+        self.per_constituency = per_constituency
+        self.writer = None
+        if output_format == 'csv':
+            self.writer = csv.writer(stream)
+            # Bez nagłówka przy dopisywaniu do istniejącego pliku (wznowiony przebieg sweep.py)
+            if header and per_constituency:
+                self.writer.writerow(['id', 'method', 'constituency'] + self.ids)
+            elif header:
+                self.writer.writerow(['id', 'method'] + self.ids)
+
+    def write(self, scenario_id, method, mandates, constituency_mandates=None):
+        # Wiersze płaskie o stałych kolumnach - łatwe do wczytania np. do Parquet/Arrow
+        if self.per_constituency:
+            rows = [
+                [scenario_id, method, number] + row.tolist()
+                for number, row in zip(self.numbers, constituency_mandates)
+            ]
+        else:
+            rows = [[scenario_id, method] + mandates.tolist()]
+        for row in rows:
+            if self.writer is not None:
+                self.writer.writerow(row)
+            else:
+                keys = ['id', 'method'] + (['constituency'] if self.per_constituency else []) + self.ids
+                self.stream.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + '\n')
+
+
+def run(scenarios, calculator, writer, default_method, default_thresholds, batch_size):
+    # Scenariusze z tą samą metodą i progami liczymy paczkami przez calculate_mandates_batch
+    committees = calculator.committees
+    batch, batch_key = [], None
+
+    def flush():
+        if not batch:
+            return
+        method, thresholds = batch_key
+        for committee, threshold in zip(committees, thresholds):
+            committee.threshold = threshold
+        result = calculator.calculate_mandates_batch(
+            [scenario['support'] for scenario in batch], method, per_constituency=writer.per_constituency
+        )
+        if writer.per_constituency:
+            mandates, constituency_mandates = result
+        else:
+            mandates, constituency_mandates = result, [None] * len(batch)
+        for scenario, row, constituency_row in zip(batch, mandates, constituency_mandates):
+            writer.write(scenario['id'], method, row, constituency_row)
+        batch.clear()
+
+    for scenario in scenarios:
+        method = scenario['method'] or default_method
+        if method not in METHODS:
+            raise ValueError("Nieznana metoda: {}".format(method))
+        thresholds = dict(default_thresholds)
+        thresholds.update(scenario['thresholds'])
+        key = (method, tuple(thresholds.get(c.id, c.threshold) for c in committees))
+        if key != batch_key or len(batch) >= batch_size:
+            flush()
+            batch_key = key
+        batch.append(scenario)
+    flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kalkulator mandatów bez interfejsu graficznego")
+    parser.add_argument('input', nargs='?', default='-', help="plik ze scenariuszami (CSV/JSONL), '-' = stdin")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'], help="domyślnie z rozszerzenia pliku")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('-o', '--output', default='-', help="plik wynikowy, '-' = stdout")
+    parser.add_argument('--method', choices=METHODS, default='dHondt')
+    parser.add_argument('--threshold', action='append', metavar='ID=PRÓG', help="np. --threshold td=8")
+    parser.add_argument('--per-constituency', action='store_true', help="wiersz dla każdego okręgu")
+    parser.add_argument('--data', default='wybory2023.csv', help="wyniki historyczne w okręgach")
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--units', help="wyniki w gminach/powiatach: poparcie przenoszone na jednostki i sumowane w okręgach")
+    parser.add_argument('--exact', action='store_true',
+                        help="podział na całkowitych liczbach głosów (głosy ważne lub uprawnieni i frekwencja w danych)")
+    parser.add_argument('--valid-votes-per-seat', type=float,
+                        help="tryb dokładny bez liczby głosów w danych: głosy ważne w okręgu = mandaty x ta wartość")
+    parser.add_argument('--tie-break', choices=TIE_BREAKS, default='order', help="rozstrzyganie remisów")
+    parser.add_argument('--seed', type=int, default=0, help="ziarno losowania remisów")
+    args = parser.parse_args(argv)
+
+    committees = default_committees()
+    constituencies = load_constituencies(args.data)
+    projection = MunicipalityModel.from_file(args.units, committees, constituencies) if args.units else None
+    valid_votes = None
+    if args.valid_votes_per_seat is not None:
+        valid_votes = constituencies.sizes * args.valid_votes_per_seat
+    calculator = ElectionCalculator(committees, constituencies, projection=projection, exact=args.exact,
+                                    valid_votes=valid_votes, tie_break=args.tie_break, seed=args.seed)
+    try:
+        default_thresholds = parse_thresholds(args.threshold, committees)
+    except ValueError as e:
+        parser.error(str(e))
+
+    input_format = args.input_format or ('jsonl' if args.input.endswith(('.jsonl', '.json')) else 'csv')
+    input_stream = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    output_stream = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        writer = ResultWriter(output_stream, args.output_format, committees, constituencies, args.per_constituency)
+        run(read_scenarios(input_stream, input_format, committees), calculator, writer,
+            args.method, default_thresholds, args.batch_size)
+    except (ValueError, KeyError) as e:
+        sys.exit("Błąd: {}".format(e))
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+
+if __name__ == "__main__":
+    main()
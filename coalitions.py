@@ -0,0 +1,86 @@
+from collections import Counter
+
+MAJORITY = 231
+
+# Pary komitetów, które nie wejdą razem do koalicji (krawędzie grafu konfliktów)
+DEFAULT_CONFLICTS = [('pis', 'ko'), ('nl', 'konf'), ('nl', 'pis')]
+
+
+class CoalitionEngine:
+    def __init__(self, committee_ids, conflicts=DEFAULT_CONFLICTS, majority=MAJORITY):
+        # Koalicja to maska bitowa: bit i odpowiada komitetowi committee_ids[i]
+        self.ids = list(committee_ids)
+        self.majority = majority
+        index = {committee_id: i for i, committee_id in enumerate(self.ids)}
+        self.conflict_masks = [0] * len(self.ids)
+        for a, b in conflicts:
+            # Konflikty z komitetami spoza listy pomijamy, żeby ten sam graf działał dla różnych zestawów list
+            if a in index and b in index:
+                self.conflict_masks[index[a]] |= 1 << index[b]
+                self.conflict_masks[index[b]] |= 1 << index[a]
+
+    def mask(self, committee_ids):
+        mask = 0
+        for committee_id in committee_ids:
+            mask |= 1 << self.ids.index(committee_id)
+        return mask
+
+    def members(self, mask):
+        return [i for i in range(len(self.ids)) if mask >> i & 1]
+
+    def member_ids(self, mask):
+        return [self.ids[i] for i in self.members(mask)]
+
+    def compatible(self, mask):
+        return all(not self.conflict_masks[i] & mask for i in self.members(mask))
+
+    def _search(self, seats, minimal):
+        # Przeszukiwanie w głąb po komitetach od największego; gałąź odcinamy, gdy nawet wszystkie
+        # pozostałe mandaty nie dadzą większości albo gdy komitet jest w konflikcie z już wybranymi
+        order = sorted(range(len(self.ids)), key=lambda i: -seats[i])
+        if minimal:
+            order = [i for i in order if seats[i] > 0]  # Komitet bez mandatów nigdy nie jest potrzebny
+        remaining = [0] * (len(order) + 1)
+        for position in range(len(order) - 1, -1, -1):
+            remaining[position] = remaining[position + 1] + seats[order[position]]
+
+        found = []
+
+        def extend(position, mask, total):
+            if total >= self.majority:
+                found.append((mask, total))
+                if minimal:
+                    # Dalsze rozszerzenia nie są minimalne: ostatnio dodany komitet jest najmniejszy,
+                    # więc bez niego (ani bez żadnego innego) koalicja traci większość
+                    return
+            for next_position in range(position, len(order)):
+                if total + remaining[next_position] < self.majority:
+                    return
+                i = order[next_position]
+                if self.conflict_masks[i] & mask:
+                    continue
+                extend(next_position + 1, mask | 1 << i, total + seats[i])
+
+        extend(0, 0, 0)
+        return found
+
+    def winning_coalitions(self, seats):
+        # Wszystkie zgodne koalicje z większością: lista (maska, suma mandatów)
+        return self._search(seats, minimal=False)
+
+    def minimal_winning_coalitions(self, seats):
+        # Koalicje, w których każdy członek jest potrzebny do większości
+        return self._search(seats, minimal=True)
+
+    def frequencies(self, seat_rows, minimal=True):
+        # Jak często dana koalicja ma większość w serii scenariuszy (np. losowań Monte Carlo);
+        # wiele scenariuszy daje ten sam podział mandatów, więc wyniki zapamiętujemy
+        counts = Counter()
+        known = {}
+        for row in seat_rows:
+            key = tuple(int(s) for s in row)
+            coalitions = known.get(key)
+            if coalitions is None:
+                coalitions = known[key] = [mask for mask, _ in self._search(key, minimal)]
+            counts.update(coalitions)
+        return counts
@@ -0,0 +1,87 @@
+import numpy as np
+
+from models import Committee
+from calculator import ElectionCalculator
+
+STEPS = 1000  # Suwak poparcia: 0.0% - 100.0% co 0.1%
+
+
+def scaled_support(base, party, values):
+    # Poparcie przy wartości `values` komitetu `party`: pozostałe komitety jak w `base`, a gdy suma
+    # przekroczy 100% - proporcjonalnie obniżone, tak żeby razem z `party` dawały 100%
+    values = np.atleast_1d(np.asarray(values, dtype=float))
+    others = np.array(base, dtype=float)
+    others[party] = 0.0
+    other_sum = others.sum()
+    supports = np.repeat(others[None, :], values.size, axis=0)
+    if other_sum > 0:
+        factor = np.where(values + other_sum > 100, (100 - values) / other_sum, 1.0)
+        supports *= factor[:, None]
+    supports[:, party] = values
+    return supports
+
+
+def curve_key(base, party, method, thresholds):
+    # Krzywa komitetu nie zależy od jego własnej wartości w `base`
+    others = tuple(0.0 if i == party else float(value) for i, value in enumerate(base))
+    return party, others, method, tuple(thresholds)
+
+
+class SeatCurve:
+    def __init__(self, key, supports, constituency_mandates, steps=STEPS):
+        # constituency_mandates: kroki x okręgi x komitety; przechowujemy tylko punkty, w których
+        # zmienia się podział w okręgu, razem z podziałem obowiązującym od tego punktu
+        self.key = key
+        self.steps = steps
+        self.supports = supports
+        changes = (constituency_mandates[1:] != constituency_mandates[:-1]).any(axis=2)
+        self.breakpoints = []
+        self.rows = []
+        for row in range(constituency_mandates.shape[1]):
+            starts = np.concatenate(([0], np.flatnonzero(changes[:, row]) + 1)).astype(np.int16)
+            self.breakpoints.append(starts)
+            self.rows.append(constituency_mandates[starts, row].astype(np.int16))
+
+    def step_of(self, value):
+        # Numer kroku, jeśli wartość leży dokładnie na siatce krzywej
+        step = round(value * self.steps / 100)
+        if 0 <= step <= self.steps and step / (self.steps / 100) == value:
+            return step
+        return None
+
+    def support(self, step):
+        return self.supports[step].tolist()
+
+    def constituency_mandates(self, step):
+        return np.array([
+            rows[np.searchsorted(starts, step, side='right') - 1]
+            for starts, rows in zip(self.breakpoints, self.rows)
+        ], dtype=np.int64)
+
+    def mandates(self, step):
+        return self.constituency_mandates(step).sum(axis=0).tolist()
+
+    def seat_curve(self):
+        # Krajowa liczba mandatów dla każdego kroku: kroki x komitety
+        result = np.zeros((self.steps + 1, len(self.rows[0][0])), dtype=np.int64)
+        for starts, rows in zip(self.breakpoints, self.rows):
+            ends = np.append(starts[1:], self.steps + 1)
+            result += np.repeat(rows, ends - starts, axis=0)
+        return result
+
+
+def build_seat_curve(committees, constituencies, base, party, method, decimals=None, steps=STEPS, projection=None):
+    # Własne kopie komitetów i kalkulatora: budowa może trwać w tle, gdy GUI zmienia progi
+    thresholds = [committee.threshold for committee in committees]
+    committees = [
+        Committee(committee.id, committee.name, committee.threshold, committee.pastSupportEquivalence)
+        for committee in committees
+    ]
+    calculator = ElectionCalculator(committees, constituencies, projection=projection)
+    values = np.arange(steps + 1) / (steps / 100)
+    supports = scaled_support(base, party, values)
+    if decimals is not None:
+        # Tak jak klucz SeatResultCache - żeby odczyt z krzywej był identyczny z przeliczeniem
+        supports = np.array([[round(float(s), decimals) for s in row] for row in supports])
+    _, constituency_mandates = calculator.calculate_mandates_batch(supports, method, per_constituency=True)
+    return SeatCurve(curve_key(base, party, method, thresholds), supports, constituency_mandates, steps)
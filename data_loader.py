@@ -1,20 +1,175 @@
 import csv
-from models import Constituency
-
-def load_constituencies(file_path):
-    constituencies = []
-    with open(file_path, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter=';')
-        next(reader)  # Pomiń nagłówek
-        for row in reader:
-            number = int(row[0])
-            size = int(row[1])
-            past_support = {
-                'td': float(row[2].replace(',', '.')),
-                'nl': float(row[3].replace(',', '.')),
-                'pis': float(row[4].replace(',', '.')),
-                'konf': float(row[5].replace(',', '.')),
-                'ko': float(row[6].replace(',', '.')),
-            }
-            constituencies.append(Constituency(number, size, past_support))
-    return constituencies
\ No newline at end of file
+import io
+import json
+import os
+
+import numpy as np
+
+from models import ConstituencySet
+
+# Kolumny opisujące jednostkę (okręg, gmina), a nie wynik komitetu; pozostałe kolumny liczbowe to komitety
+KEY_COLUMNS = {
+    'nr okręgu': 'number',
+    'mandaty': 'size',
+    'teryt': 'teryt',
+    'kod teryt': 'teryt',
+    'gmina': 'name',
+    'powiat': 'county',
+    'województwo': 'voivodeship',
+    'nr okręgu sejmowego': 'sejm_number',
+    'nr okręgu senackiego': 'senate_number',
+    'uprawnieni': 'eligible',
+    'frekwencja': 'turnout',
+    'głosy ważne': 'valid',
+}
+
+# Pełne nazwy komitetów w nagłówkach innych zestawień -> identyfikatory używane w models.Committee
+PARTY_ALIASES = {
+    'trzecia droga': 'td',
+    'lewica': 'nl',
+    'nowa lewica': 'nl',
+    'prawo i sprawiedliwość': 'pis',
+    'konfederacja': 'konf',
+    'koalicja obywatelska': 'ko',
+}
+
+# Znane zbiory danych: nazwa -> plik (wyniki w okręgach lub gminach)
+ELECTIONS = {
+    'sejm2023': 'wybory2023.csv',
+}
+
+# Kody i nazwy zostają tekstem (np. TERYT z zerem na początku)
+TEXT_COLUMNS = {'teryt', 'name', 'county', 'voivodeship'}
+
+CACHE_DIR = '.cache'
+
+
+class ElectionTable:
+    def __init__(self, columns, values, parties, text_columns=None, source=None):
+        # Dane kolumnowe: jedna macierz liczb (wiersze x kolumny) i osobno kolumny tekstowe
+        self.columns = list(columns)
+        self.values = values
+        self.parties = list(parties)
+        self.text_columns = text_columns or {}
+        self.source = source
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def has_column(self, name):
+        return name in self._index or name in self.text_columns
+
+    def column(self, name):
+        if name in self.text_columns:
+            return self.text_columns[name]
+        if name not in self._index:
+            raise ValueError("Brak kolumny: {}".format(name))
+        return self.values[:, self._index[name]]
+
+    @property
+    def support(self):
+        # Wiersze x komitety w kolejności self.parties
+        return self.values[:, [self._index[party] for party in self.parties]]
+
+    def constituencies(self):
+        # Okręgi jako ConstituencySet: wyniki z przeszłości pozostają jedną macierzą
+        # Głosy ważne wprost albo z liczby uprawnionych i frekwencji (%)
+        valid_votes = None
+        if self.has_column('valid'):
+            valid_votes = self.column('valid')
+        elif self.has_column('eligible') and self.has_column('turnout'):
+            valid_votes = self.column('eligible') * self.column('turnout') / 100
+        return ConstituencySet(
+            self.column('number').astype(int), self.column('size').astype(int), self.parties, self.support,
+            valid_votes
+        )
+
+
+def column_id(header):
+    # Nazwa kolumny z nagłówka: znane kolumny opisowe mają stałe nazwy, komitety - małe litery (np. PiS -> pis)
+    name = header.strip().lower()
+    return KEY_COLUMNS.get(name, PARTY_ALIASES.get(name, name))
+
+
+def parse_table(stream, source=None):
+    header = stream.readline().lstrip('\ufeff')
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    names = [column_id(name) for name in next(csv.reader([header], delimiter=delimiter))]
+    rows = [row for row in csv.reader(stream, delimiter=delimiter) if row]
+    if not rows:
+        return ElectionTable(names, np.zeros((0, len(names))), [n for n in names if n not in KEY_COLUMNS.values()],
+                             source=source)
+    cells = np.array(rows, dtype=str)
+    if cells.shape[1] != len(names):
+        raise ValueError("Niepoprawna liczba kolumn w pliku {}".format(source))
+    cells = np.char.strip(cells)
+
+    numeric, values, text_columns = [], [], {}
+    for i, name in enumerate(names):
+        column = cells[:, i]
+        if name in TEXT_COLUMNS:
+            text_columns[name] = column.tolist()
+            continue
+        # Przecinek dziesiętny tylko w kolumnach liczbowych - nazwy i opisy zostają bez zmian
+        number_column = np.char.replace(column, ',', '.') if delimiter == ';' else column
+        try:
+            # Pusta komórka: komitet nie startował w danej jednostce
+            values.append(np.where(number_column == '', '0', number_column).astype(float))
+            numeric.append(name)
+        except ValueError:
+            text_columns[name] = column.tolist()
+    parties = [name for name in numeric if name not in KEY_COLUMNS.values()]
+    return ElectionTable(numeric, np.column_stack(values), parties, text_columns, source)
+
+
+def _cache_paths(file_path):
+    directory, name = os.path.split(os.path.abspath(file_path))
+    base = os.path.join(directory, CACHE_DIR, name)
+    return base + '.npy', base + '.json'
+
+
+def load_table(file_path, use_cache=True):
+    # Tabela wyników z pliku CSV; przy ponownym wczytaniu macierz liczb pochodzi z pliku .npy
+    # mapowanego w pamięci, a opis kolumn z pliku .json obok
+    if file_path in ELECTIONS:
+        file_path = ELECTIONS[file_path]
+    stat = os.stat(file_path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    values_path, meta_path = _cache_paths(file_path)
+
+    if use_cache:
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['signature'] == signature:
+                values = np.load(values_path, mmap_mode='r')
+                return ElectionTable(meta['columns'], values, meta['parties'], meta['text_columns'], file_path)
+        except (OSError, ValueError, KeyError):
+            pass  # Brak lub nieaktualna pamięć podręczna - czytamy CSV
+
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        table = parse_table(io.StringIO(f.read()), file_path)
+
+    if use_cache:
+        try:
+            os.makedirs(os.path.dirname(values_path), exist_ok=True)
+            # Zapis przez plik tymczasowy, żeby równoległe wczytanie nie trafiło na niepełny plik
+            with open(values_path + '.tmp', 'wb') as f:
+                np.save(f, np.ascontiguousarray(table.values))
+            os.replace(values_path + '.tmp', values_path)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({
+                    'signature': signature,
+                    'columns': table.columns,
+                    'parties': table.parties,
+                    'text_columns': table.text_columns,
+                }, f, ensure_ascii=False)
+            os.replace(meta_path + '.tmp', meta_path)
+        except OSError:
+            pass  # Katalog tylko do odczytu - działamy bez pamięci podręcznej
+    return table
+
+
+def load_constituencies(file_path, use_cache=True):
+    return load_table(file_path, use_cache).constituencies()
@@ -3,23 +3,26 @@ from PySide6.QtWidgets import (
     QListWidget, QTextEdit, QLineEdit, QMessageBox, QPushButton, QFormLayout,
     QComboBox, QSizePolicy, QGridLayout
 )
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QByteArray
+from PySide6.QtGui import QKeySequence, QShortcut
 from PySide6.QtSvgWidgets import QSvgWidget
-from sympy.codegen.ast import continue_
 
-from models import Committee
+from models import default_committees
 from data_loader import load_constituencies
-from calculator import ElectionCalculator
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from bs4 import BeautifulSoup
+from calculator import ElectionCalculator, available_methods
+from cache import SeatResultCache
+from workers import RecalculationPipeline
+from coalitions import CoalitionEngine
+from instrumentation import Profiler
+from curves import build_seat_curve, curve_key, scaled_support
+import os
 import sys
+import time
 
 from validators import DotCommaDoubleValidator  # Import walidatora z osobnego pliku
 
 class ElectionApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
         self.setWindowTitle("Kalkulator mandatów")
         self.setGeometry(100, 100, 1600, 900)
@@ -30,13 +33,8 @@ class ElectionApp(QMainWindow):
         self.main_layout = QGridLayout(self.central_widget)
 
         # Definicja komitetów
-        self.committees = [
-            Committee('td', 'Trzecia Droga', 5, [['td', 1]]),
-            Committee('nl', 'Lewica', 5, [['nl', 1]]),
-            Committee('pis', 'Prawo i Sprawiedliwość', 5, [['pis', 1]]),
-            Committee('konf', 'Konfederacja', 5, [['konf', 1]]),
-            Committee('ko', 'Koalicja Obywatelska', 5, [['ko', 1]])
-        ]
+        self.committees = default_committees()
+        self.coalition_engine = CoalitionEngine([committee.id for committee in self.committees])
         self.colors = {
             'td': '#FFFF00',
             'nl': '#FF0000',
@@ -47,7 +45,7 @@ class ElectionApp(QMainWindow):
 
         # Wczytanie okręgów i inicjalizacja kalkulatora
         self.constituencies = load_constituencies('wybory2023.csv')
-        self.calculator = ElectionCalculator(self.committees, self.constituencies)
+        self.calculator = ElectionCalculator(self.committees, self.constituencies, cache=SeatResultCache(maxsize=4096))
 
         # --- Sekcja suwaków (kolumna 0, wiersz 0) ---
         self.form_layout = QFormLayout()
@@ -55,6 +53,7 @@ class ElectionApp(QMainWindow):
         self.support_entries = []
         self.threshold_combos = []
         self.last_changed_index = None  # Aby wiedzieć, która partia była ostatnio zmieniana
+        self.scale_base = None  # Poparcie w chwili wybrania komitetu - punkt odniesienia przy obniżaniu pozostałych
 
         self.suwaki_container = QWidget()
         self.suwaki_container.setLayout(self.form_layout)
@@ -99,6 +98,8 @@ class ElectionApp(QMainWindow):
 
             # Podpięcie sygnałów
             slider.valueChanged.connect(lambda val, i=idx: self.handle_slider_change(i, val))
+            slider.sliderPressed.connect(lambda i=idx: self.select_committee(i))
+            slider.sliderReleased.connect(self.request_seat_curves)
             entry.editingFinished.connect(lambda i=idx: self.handle_entry_finished(i))
             threshold_combo.currentIndexChanged.connect(lambda index, i=idx: self.handle_threshold_change(i, index))
 
@@ -115,7 +116,7 @@ class ElectionApp(QMainWindow):
             self.threshold_combos.append(threshold_combo)
 
         self.method_combo = QComboBox()  # [ZM]
-        self.method_combo.addItems(["dHondt", "SainteLague", "HareNiemeyer"])  # [ZM]
+        self.method_combo.addItems(available_methods())  # [ZM]
         self.method_combo.currentIndexChanged.connect(lambda: self.update_mandates())  # [ZM]
         self.form_layout.addRow(QLabel("Metoda obliczania mandatów:"), self.method_combo)  # [ZM]
 
@@ -130,6 +131,7 @@ class ElectionApp(QMainWindow):
         self.main_layout.addWidget(self.bar_chart_container, 0, 2)
 
         # --- Sekcja MAPA (kolumna 0, wiersz 1) ---
+        self.map_renderer = None  # Szablon do kolorowania wczytywany w tle (warm_up)
         self.map_widget = QSvgWidget("okregi.svg")
         self.map_widget.setFixedSize(400, 400)
         self.main_layout.addWidget(self.map_widget, 1, 0)
@@ -157,27 +159,109 @@ class ElectionApp(QMainWindow):
         self.coalitions_layout.addWidget(self.coalitions_text)
         self.main_layout.addWidget(self.coalitions_container, 1, 2)
 
-        # Timer do opóźnionego przeliczania
-        self.debounce_timer = QTimer()
-        self.debounce_timer.setSingleShot(True)
-        self.debounce_timer.setInterval(300)
-        self.debounce_timer.timeout.connect(self.calculate_mandates)
-
-        self.donut_canvas = None
-        self.bar_canvas = None
-        self.constituency_canvas = None
+        # Wykresy (matplotlib) tworzymy dopiero po wyświetleniu okna, gdy moduły zostaną zaimportowane
+        # w tle; do tego czasu kontenery pokazują etykiety zastępcze
+        self.donut_chart = None
+        self.bar_chart = None
+        self.constituency_chart = None
+        self.chart_placeholders = [QLabel("Wczytywanie wykresu…"), QLabel("Wczytywanie wykresu…")]
+        for placeholder, layout in zip(self.chart_placeholders, (self.donut_chart_layout, self.bar_chart_layout)):
+            placeholder.setAlignment(Qt.AlignCenter)
+            layout.addWidget(placeholder)
+
+        # Opcjonalna instrumentacja etapów przeliczenia (ELECTIONS_PROFILE=1), nakładka pod klawiszem F12
+        self.profiler = profiler if profiler is not None else Profiler.from_environment()
+        self.first_paint_pending = True
+        self.profiling_overlay = QLabel(self.central_widget)
+        self.profiling_overlay.setStyleSheet(
+            "background: rgba(0, 0, 0, 170); color: #00FF00; font-family: monospace; padding: 6px;"
+        )
+        self.profiling_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.profiling_overlay.setVisible(self.profiler.enabled)
+        QShortcut(QKeySequence("F12"), self, self.toggle_profiling_overlay)
+
+        # Obliczenia i przygotowanie danych wykresów w wątku roboczym; widżety aktualizujemy tylko tutaj
+        self.results = None  # Ostatnio wyświetlony wynik
+        self.pipeline = RecalculationPipeline(self)
+        self.pipeline.finished.connect(self.apply_results)
+        self.pipeline.failed.connect(self.handle_calculation_error)
+
+        # Krzywe mandatów dla suwaków budowane w tle: przesunięcie suwaka staje się odczytem z krzywej,
+        # więc przeliczamy od razu, bez opóźniania
+        self.seat_curves = {}
+        self.curve_pipeline = RecalculationPipeline(self)
+        self.curve_pipeline.finished.connect(self.store_seat_curves)
+
+        # Import matplotlib, próbne rysowanie i szablon mapy w tle; wykresy dołączamy w finish_startup
+        self.startup_pipeline = RecalculationPipeline(self)
+        self.startup_pipeline.finished.connect(self.finish_startup)
+        self.startup_pipeline.failed.connect(self.handle_calculation_error)
+        self.startup_pipeline.submit(self.warm_up)
 
         QTimer.singleShot(0, self.calculate_mandates)
+        QTimer.singleShot(0, self.request_seat_curves)
+
+    def warm_up(self, cancelled):
+        # Wykonywane w wątku roboczym - bez tworzenia widżetów
+        with self.profiler.stage('import.charts'):
+            import charts
+        with self.profiler.stage('startup.charts_warm_up'):
+            charts.warm_up()
+        with self.profiler.stage('import.map_renderer'):
+            from map_renderer import MapRenderer
+        with self.profiler.stage('startup.map_template'):
+            map_renderer = MapRenderer("okregi.svg")
+        return charts, map_renderer
+
+    def finish_startup(self, modules):
+        charts, self.map_renderer = modules
+        with self.profiler.stage('startup.charts'):
+            # Wykresy tworzone raz; przy przeliczeniu aktualizujemy je w miejscu
+            for placeholder in self.chart_placeholders:
+                placeholder.deleteLater()
+            self.chart_placeholders = []
+            self.donut_chart = charts.DonutChart(len(self.committees) + 1)
+            self.donut_chart_layout.addWidget(self.donut_chart.canvas)
+            self.bar_chart = charts.SupportBarChart(len(self.committees))
+            self.bar_chart_layout.addWidget(self.bar_chart.canvas)
+            self.constituency_chart = charts.ConstituencyChart(len(self.committees))
+            self.constituency_chart.canvas.hide()
+            self.details_layout.addWidget(self.constituency_chart.canvas)
+        if self.profiler.enabled:
+            self.profiler.record('startup.ready', self.profiler.origin_ns,
+                                 time.perf_counter_ns() - self.profiler.origin_ns)
+            print(self.profiler.overlay_text(('import.', 'startup.')), file=sys.stderr)
+        # Pełne przeliczenie: wcześniejsze wyniki nie zawierały danych wykresów ani mapy
+        self.results = None
+        self.calculate_mandates()
+
+    def paintEvent(self, event):
+        if self.first_paint_pending:
+            # Czas od utworzenia profilera (początek main.py) do pierwszego rysowania okna
+            self.first_paint_pending = False
+            self.profiler.record('startup.first_paint', self.profiler.origin_ns,
+                                 time.perf_counter_ns() - self.profiler.origin_ns)
+        super().paintEvent(event)
+
+    def select_committee(self, index):
+        # Zmiana komitetu: bieżące poparcie staje się punktem odniesienia dla pozostałych
+        if index != self.last_changed_index or self.scale_base is None:
+            try:
+                self.scale_base = self.current_support()
+            except ValueError:
+                self.scale_base = None
+            self.last_changed_index = index
+            self.request_seat_curves([index])
 
     def handle_slider_change(self, index, val):
-        self.last_changed_index = index
+        self.select_committee(index)
         self.support_entries[index].blockSignals(True)
         self.support_entries[index].setText(f"{val / 10:.2f}")
         self.support_entries[index].blockSignals(False)
-        self.debounce_timer.start()
+        self.calculate_mandates()
 
     def handle_entry_finished(self, index):
-        self.last_changed_index = index
+        self.select_committee(index)
         entry = self.support_entries[index]
         slider = self.support_sliders[index]
         try:
@@ -191,55 +275,203 @@ class ElectionApp(QMainWindow):
                 raise ValueError
         except ValueError:
             QMessageBox.warning(self, "Błąd", "Wpisz wartość od 0.0 do 100.0!")
-        self.debounce_timer.start()
+        self.calculate_mandates()
+        self.request_seat_curves()
 
     def update_mandates(self):
-        self.debounce_timer.start()
+        # Zmiana metody lub progów: dotychczasowe krzywe są nieaktualne
+        self.calculate_mandates()
+        self.request_seat_curves()
+
+    def current_support(self):
+        return [float(entry.text().replace(',', '.')) for entry in self.support_entries]
+
+    def thresholds(self):
+        return [committee.threshold for committee in self.committees]
+
+    def request_seat_curves(self, parties=None):
+        # Krzywe mandatów dla bieżącego stanu suwaków (domyślnie wszystkich komitetów, żeby kolejny
+        # wybrany suwak miał krzywą od razu). Dla aktualnie zmienianego komitetu punktem odniesienia
+        # jest poparcie z chwili jego wybrania, dla pozostałych - bieżące.
+        try:
+            current = self.current_support()
+        except ValueError:
+            return
+        if parties is None:
+            parties = range(len(self.committees))
+        method = self.method_combo.currentText()
+        thresholds = self.thresholds()
+        missing = []
+        for party in parties:
+            base = self.scale_base if party == self.last_changed_index and self.scale_base is not None else current
+            if curve_key(base, party, method, thresholds) not in self.seat_curves:
+                missing.append((party, base))
+        if not missing:
+            return
+        committees = self.committees
+        constituencies = self.constituencies
+        decimals = self.calculator.cache.decimals if self.calculator.cache is not None else None
+        projection = self.calculator.projection
+
+        def compute(cancelled):
+            curves = []
+            for party, base in missing:
+                if cancelled():
+                    break
+                with self.profiler.stage('curve.build'):
+                    curves.append(build_seat_curve(committees, constituencies, base, party, method, decimals,
+                                                   projection=projection))
+            return curves
+
+        self.curve_pipeline.submit(compute)
+
+    def store_seat_curves(self, curves):
+        # Zostawiamy tylko krzywe dla bieżącej metody i progów, najwyżej dwie na komitet
+        method = self.method_combo.currentText()
+        thresholds = tuple(self.thresholds())
+        self.seat_curves = {
+            key: curve for key, curve in self.seat_curves.items() if key[2] == method and key[3] == thresholds
+        }
+        for curve in curves:
+            self.seat_curves.pop(curve.key, None)
+            self.seat_curves[curve.key] = curve
+        while len(self.seat_curves) > 2 * len(self.committees):
+            del self.seat_curves[next(iter(self.seat_curves))]
 
     def calculate_mandates(self):
         try:
-            support = [float(entry.text().replace(',', '.')) for entry in self.support_entries]
-            total_support = sum(support)
-
-            # Jeśli suma przekracza 100%, proporcjonalnie obniżamy wartości pozostałych partii
-            if total_support > 100 and self.last_changed_index is not None:
-                changed_value = support[self.last_changed_index]
-                other_sum = total_support - changed_value
-                if other_sum > 0:
-                    factor = (100 - changed_value) / other_sum
-                    for i in range(len(support)):
-                        if i != self.last_changed_index:
-                            new_value = support[i] * factor
-                            support[i] = new_value
+            with self.profiler.stage('parse_entries'):
+                support = self.current_support()
+                index = self.last_changed_index
+
+                # Jeśli suma przekracza 100%, proporcjonalnie obniżamy wartości pozostałych partii
+                # (względem poparcia z chwili wybrania komitetu, więc cofnięcie suwaka je przywraca)
+                if index is not None and self.scale_base is not None:
+                    support = scaled_support(self.scale_base, index, support[index])[0].tolist()
+                    for i, new_value in enumerate(support):
+                        if i != index and self.support_entries[i].text() != f"{new_value:.2f}":
                             self.support_sliders[i].blockSignals(True)
                             self.support_entries[i].blockSignals(True)
                             self.support_sliders[i].setValue(int(new_value * 10))
                             self.support_entries[i].setText(f"{new_value:.2f}")
                             self.support_sliders[i].blockSignals(False)
                             self.support_entries[i].blockSignals(False)
-                total_support = sum(support)  # Powinno wynosić 100%
-
-            method = self.method_combo.currentText()  # [ZM]
-            mandates = self.calculator.calculate_mandates(support, method=method)  # [ZM]
 
-            if self.constituency_list.currentRow() == -1:
-                self.constituency_list.setCurrentRow(0)
-            self.show_constituency_details()
-            self.show_donut_chart(mandates)
-            self.show_bar_chart()
-            self.color_map()
-
-            self.update_coalitions_widget(mandates)
+                national_support = self.current_support()
+                method = self.method_combo.currentText()  # [ZM]
+                # Progi ustalone w chwili zlecenia - wątek roboczy nie czyta obiektów Committee
+                thresholds = tuple(self.thresholds())
+                lookup = None
+                if index is not None and self.scale_base is not None:
+                    curve = self.seat_curves.get(curve_key(self.scale_base, index, method, thresholds))
+                    step = curve.step_of(support[index]) if curve is not None else None
+                    if step is not None:
+                        lookup = (curve, step)
+            submitted_ns = time.perf_counter_ns()
+            self.pipeline.submit(
+                lambda cancelled: self.compute_results(
+                    support, national_support, method, cancelled, submitted_ns, lookup, thresholds
+                )
+            )
 
         except ValueError:
             QMessageBox.critical(self, "Błąd", "Wpisz poprawne wartości numeryczne!")
 
-    def show_donut_chart(self, mandates):
-        if self.donut_canvas is not None:
-            self.donut_chart_layout.removeWidget(self.donut_canvas)
-            self.donut_canvas.deleteLater()
-            self.donut_canvas = None
-
+    def compute_results(self, support, national_support, method, cancelled, submitted_ns=None, lookup=None,
+                        thresholds=None):
+        # Wykonywane w wątku roboczym - bez dostępu do widżetów
+        if lookup is not None:
+            # Wartość suwaka leży na gotowej krzywej mandatów - odczyt zamiast przeliczenia
+            with self.profiler.stage('seat_lookup'):
+                curve, step = lookup
+                mandates = self.calculator.apply_precomputed(
+                    curve.support(step), curve.constituency_mandates(step), method, thresholds
+                )
+        else:
+            with self.profiler.stage('seat_allocation'):
+                mandates = self.calculator.calculate_mandates_incremental(
+                    support, method=method, thresholds=thresholds
+                ).mandates  # [ZM]
+        constituencies = [(list(c.support), list(c.mandates)) for c in self.constituencies]
+        winners = self.get_winners(constituencies)
+
+        # Przygotowujemy tylko to, co różni się od aktualnie wyświetlanego wyniku
+        shown = self.results
+        national_changed = shown is None or shown['mandates'] != mandates
+        with self.profiler.stage('data.bar'):
+            bar_data = self.bar_chart_data(national_support)
+        results = {
+            'mandates': mandates,
+            'national_support': national_support,
+            'constituencies': constituencies,
+            'winners': winners,
+            'bar': bar_data,
+            'donut': None,
+            'coalitions': None,
+            'map': None,
+            'submitted_ns': submitted_ns,
+        }
+        if national_changed:
+            with self.profiler.stage('data.donut'):
+                results['donut'] = self.donut_chart_data(mandates)
+            if cancelled():
+                return None
+            with self.profiler.stage('coalitions'):
+                results['coalitions'] = self.build_coalitions_text(mandates, national_support)
+        if cancelled():
+            return None
+        if self.map_renderer is not None and (shown is None or shown['winners'] != winners):
+            with self.profiler.stage('map.recolour'):
+                results['map'] = self.color_map(winners)
+        return results
+
+    def apply_results(self, results):
+        previous = self.results
+        self.results = results
+        row = self.constituency_list.currentRow()
+        with self.profiler.stage('chart.constituency'):
+            if row == -1:
+                self.constituency_list.setCurrentRow(0)
+            elif previous is None or previous['constituencies'][row] != results['constituencies'][row]:
+                self.show_constituency_details()
+        if results['donut'] is not None and self.donut_chart is not None:
+            with self.profiler.stage('chart.donut'):
+                self.show_donut_chart(results['donut'])
+        if self.bar_chart is not None:
+            with self.profiler.stage('chart.bar'):
+                self.show_bar_chart(results['bar'])
+        if results['map'] is not None:
+            with self.profiler.stage('map.load'):
+                self.map_widget.load(QByteArray(results['map']))
+        if results['coalitions'] is not None:
+            with self.profiler.stage('coalitions.widget'):
+                self.update_coalitions_widget(results['coalitions'])
+
+        if self.profiler.enabled and results['submitted_ns'] is not None:
+            # Całkowity czas od zlecenia przeliczenia do aktualizacji widżetów
+            self.profiler.record('recalculation', results['submitted_ns'],
+                                 time.perf_counter_ns() - results['submitted_ns'])
+            self.profiling_overlay.setText(self.profiler.overlay_text())
+            self.profiling_overlay.adjustSize()
+
+    def toggle_profiling_overlay(self):
+        self.profiling_overlay.setVisible(self.profiler.enabled and not self.profiling_overlay.isVisible())
+        self.profiling_overlay.raise_()
+
+    def handle_calculation_error(self, message):
+        QMessageBox.critical(self, "Błąd", f"Błąd obliczeń: {message}")
+
+    def closeEvent(self, event):
+        self.pipeline.shutdown()
+        self.curve_pipeline.shutdown()
+        self.startup_pipeline.shutdown()
+        if self.profiler.enabled:
+            # Zapis śladu do chrome://tracing / Perfetto oraz podsumowania etapów
+            self.profiler.export_chrome_trace(os.environ.get('ELECTIONS_TRACE', 'elections_trace.json'))
+            self.profiler.export_log(os.environ.get('ELECTIONS_PROFILE_LOG', 'elections_profile.jsonl'))
+        super().closeEvent(event)
+
+    def donut_chart_data(self, mandates):
         # fig, ax = plt.subplots(figsize=(5, 4), constrained_layout=True)
 
         short_name_mapping = {
@@ -319,25 +551,12 @@ class ElectionApp(QMainWindow):
         labels.append("")
         colors.append("white")
         data.append(total)
-        fig = plt.figure(figsize=(8, 6), dpi=100)
-        ax = fig.add_subplot(1, 1, 1)
-        ax.set_position([-0.025, -0.25, 1.1, 1.0])
-        fig.suptitle("Podział mandatów", y=0.9, fontsize=14)
-        ax.pie(data, labels=labels, colors=colors)
-        ax.add_artist(plt.Circle((0,0), 0.6, color='white'))
-        ax.axis('equal')
-
-        self.donut_canvas = FigureCanvas(fig)
-        self.donut_chart_layout.addWidget(self.donut_canvas)
-        plt.close(fig)
-
+        return data, labels, colors
 
-    def show_bar_chart(self):
-        if self.bar_canvas is not None:
-            self.bar_chart_layout.removeWidget(self.bar_canvas)
-            self.bar_canvas.deleteLater()
-            self.bar_canvas = None
+    def show_donut_chart(self, chart_data):
+        self.donut_chart.update(*chart_data)
 
+    def bar_chart_data(self, support):
         short_name_mapping = {
             "Trzecia Droga": "TD",
             "Lewica": "NL",
@@ -346,47 +565,29 @@ class ElectionApp(QMainWindow):
             "Prawo i Sprawiedliwość": "PiS"
         }
 
-        fig, ax = plt.subplots(figsize=(6, 5))
         party_names = [
             short_name_mapping.get(committee.name, committee.name)
             for committee in self.committees
         ]
-        support = [float(entry.text().replace(',', '.')) for entry in self.support_entries]
         colors = [self.colors[committee.id] for committee in self.committees]
         data = sorted(zip(support, party_names, colors), key=lambda x: x[0], reverse=True)
-        sorted_support, sorted_party_names, sorted_colors = zip(*data)
-        bars = ax.bar(sorted_party_names, sorted_support, color=sorted_colors)
+        return tuple(zip(*data))
 
-        max_support = max(sorted_support) if max(sorted_support) > 0 else 100
-        ax.set_ylim(0, max_support * 1.1)
-
-        ax.set_ylabel("Poparcie (%)")
-        ax.set_title("Poparcie krajowe partii")
-        for bar in bars:
-            height = bar.get_height()
-            ax.annotate(f'{height:.1f}%',
-                        xy=(bar.get_x() + bar.get_width() / 2, height),
-                        xytext=(0, 3), textcoords="offset points",
-                        ha='center', va='bottom', fontsize=9)
-
-        self.bar_canvas = FigureCanvas(fig)
-        self.bar_chart_layout.addWidget(self.bar_canvas)
-        plt.close(fig)
+    def show_bar_chart(self, chart_data):
+        self.bar_chart.update(*chart_data)
 
     def show_constituency_chart(self):
         # Pobieramy zaznaczony okręg
         selected_items = self.constituency_list.selectedItems()
-        if not selected_items:
+        if not selected_items or self.constituency_chart is None:
             return
         index = self.constituency_list.row(selected_items[0])
         constituency = self.constituencies[index]
-        if not constituency.mandates:
-            # Jeśli nie obliczono mandatów, czyścimy wykres
-            if hasattr(self, 'constituency_canvas'):
-                self.constituency_chart_layout.removeWidget(self.constituency_canvas)
-                self.constituency_canvas.deleteLater()
-                self.constituency_canvas = None
+        if self.results is None:
+            # Jeśli nie obliczono mandatów, ukrywamy wykres
+            self.constituency_chart.canvas.hide()
             self.details_text.setText("Przesuń suwaki, aby obliczyć mandaty!")
+            self.details_text.show()
             return
 
         short_name_mapping = {
@@ -399,64 +600,31 @@ class ElectionApp(QMainWindow):
 
         # Filtrujemy partie, które zdobyły co najmniej 1 mandat
         data = []
-        national_support = []
-        for entry in self.support_entries:
-            try:
-                val = float(entry.text().replace(',', '.'))
-            except ValueError:
-                val = 0.0
-            national_support.append(val)
+        national_support = self.results['national_support']
+        constituency_support, constituency_mandates = self.results['constituencies'][index]
 
         # Przygotowujemy dane – dla każdej partii, która zdobyła co najmniej 1 mandat
-        for idx, (committee, mandates) in enumerate(zip(self.committees, constituency.mandates)):
+        for idx, (committee, mandates) in enumerate(zip(self.committees, constituency_mandates)):
             if mandates > 0:
                 short_name = short_name_mapping.get(committee.name, committee.name)
-                # Zakładamy, że constituency.support jest listą poparcia lokalnego dla każdej partii
-                local_support = constituency.support[idx] if hasattr(constituency, 'support') and len(
-                    constituency.support) > idx else 0.0
+                # Wyniki okręgu pochodzą z migawki przygotowanej w wątku roboczym
+                local_support = constituency_support[idx] if len(constituency_support) > idx else 0.0
                 nat_support = national_support[idx] if len(national_support) > idx else 0.0
                 data.append((short_name, mandates, local_support, nat_support, self.colors[committee.id]))
 
         if not data:
+            self.constituency_chart.canvas.hide()
             self.details_text.setText("Żadna partia nie przekroczyła progu wyborczego w tym okręgu!")
+            self.details_text.show()
             return
 
         data_sorted = sorted(data, key=lambda x: (x[1], x[2], x[3]), reverse=True)
         party_names, mandates_values, _, _, colors = zip(*data_sorted)
 
-        # Przygotowujemy wykres słupkowy
-        fig, ax = plt.subplots(figsize=(6, 4))
-        bars = ax.bar(party_names, mandates_values, color=colors)
-        ax.set_ylabel("Liczba mandatów")
-        ax.set_ylim(0, max(mandates_values) + 1)
-        ax.set_title(f"Okręg {constituency.number} - Mandaty")
-        ax.yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-        ax.tick_params(axis='x', labelsize=12)
-        fig.tight_layout()
-
-        for bar in bars:
-            height = bar.get_height()
-            ax.annotate(f'{int(height)}',
-                        xy=(bar.get_x() + bar.get_width() / 2, height),
-                        xytext=(0, 3), textcoords="offset points",
-                        ha='center', va='bottom')
-
-        # Jeśli wcześniej był wyświetlany wykres, usuwamy go
-        if hasattr(self, 'constituency_canvas') and self.constituency_canvas is not None:
-            self.details_layout.removeWidget(self.constituency_canvas)
-            self.constituency_canvas.deleteLater()
-            self.constituency_canvas = None
-
-        # Tworzymy nowy canvas i dodajemy go do layoutu obszaru szczegółów
-        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-        self.constituency_canvas = FigureCanvas(fig)
-        # Jeśli używasz widgetu QTextEdit (self.details_text) do wyświetlania tekstu,
-        # możesz chcieć utworzyć nowy kontener (np. QWidget z layoutem) na wykres
-        # i dodać go poniżej lub zamiast tekstu.
-        # Dla uproszczenia zakładamy, że chcesz zastąpić tekst wykresem:
+        # Aktualizujemy istniejący wykres słupkowy zamiast tworzyć nowy
+        self.constituency_chart.update(constituency.number, party_names, mandates_values, colors)
         self.details_text.hide()  # ukrywamy pole tekstowe
-        self.details_layout.addWidget(self.constituency_canvas)
-        plt.close(fig)
+        self.constituency_chart.canvas.show()
 
     def show_constituency_details(self):
         self.show_constituency_chart()
@@ -473,32 +641,20 @@ class ElectionApp(QMainWindow):
                 details += f"Okręg {constituency.number}: Przesuń suwaki, aby obliczyć mandaty!\n\n"
         self.details_text.setText(details)
 
-    def color_map(self):
-        with open("okregi.svg", 'r', encoding='utf-8') as file:
-            svg_content = file.read()
-        soup = BeautifulSoup(svg_content, 'xml')
-        winners = self.get_winners()
-        for okreg, winner in winners.items():
-            color = self.colors.get(winner, '#FFFFFF')
-            path = soup.find('path', id=f"okreg_{okreg}")
-            if path:
-                path['style'] = f'fill:{color};stroke:#000000;stroke-width:1px;'
-        with open("colored_map.svg", "w", encoding='utf-8') as file:
-            file.write(str(soup))
-        self.map_widget.load("colored_map.svg")
-
-    def get_winners(self):
+    def color_map(self, winners):
+        colors = {okreg: self.colors.get(winner, '#FFFFFF') for okreg, winner in winners.items()}
+        return self.map_renderer.render(colors)
+
+    def get_winners(self, constituency_results):
         winners = {}
-        for constituency in self.constituencies:
-            if constituency.mandates:
-                winner_index = constituency.mandates.index(max(constituency.mandates))
+        for constituency, (_, mandates) in zip(self.constituencies, constituency_results):
+            if mandates:
+                winner_index = mandates.index(max(mandates))
                 winner_id = self.committees[winner_index].id
                 winners[constituency.number] = winner_id
         return winners
 
-    def update_coalitions_widget(self, mandates):
-        from itertools import combinations
-
+    def build_coalitions_text(self, mandates, national_support):
         # Przygotowujemy mapowanie pełnych nazw na skróty (tak jak w innych miejscach)
         short_name_mapping = {
             "Trzecia Droga": "TD",
@@ -508,61 +664,34 @@ class ElectionApp(QMainWindow):
             "Prawo i Sprawiedliwość": "PiS"
         }
 
-        # Pobieramy krajowe poparcie dla każdej partii (zakładamy, że kolejność jest zgodna)
-        national_support = []
-        for entry in self.support_entries:
-            try:
-                val = float(entry.text().replace(',', '.'))
-            except ValueError:
-                val = 0.0
-            national_support.append(val)
-
         coalitions = []
-        n = len(self.committees)
-        indices = list(range(n))
-
-        # Przeglądamy wszystkie kombinacje (od 1 do n partii)
-        for r in range(1, n + 1):
-            for subset in combinations(indices, r):
-                subset_ids = [self.committees[i].id for i in subset]
-                if 'pis' in subset_ids and 'ko' in subset_ids:
-                    continue
-                if 'nl' in subset_ids and 'konf' in subset_ids:
-                    continue
-                if 'nl' in subset_ids and 'pis' in subset_ids:
-                    continue
-                total = sum(mandates[i] for i in subset)
-                if total >= 231:
-                    # Dla każdej partii w koalicji zbieramy: skrót nazwy, liczbę mandatów,
-                    # lokalne poparcie (jeśli dostępne, zakładamy, że constituency.support nie jest tutaj dostępne)
-                    # oraz krajowe poparcie.
-                    coalition_data = []
-                    for i in subset:
-                        abbr = short_name_mapping.get(self.committees[i].name, self.committees[i].name)
-                        coalition_data.append((abbr, mandates[i], national_support[i]))
-                    # Sortujemy partie w koalicji – najpierw według mandatów, potem krajowego poparcia
-                    coalition_data.sort(key=lambda x: (x[1], x[2]), reverse=True)
-                    if len(subset) == 1:
-                        coalition_str = f"Samodzielna większość: {coalition_data[0][0]} ({coalition_data[0][1]})"
-                    else:
-                        coalition_str = "Koalicja: " + "+".join(f"{abbr}({mand})" for abbr, mand, _ in coalition_data)
-                        coalition_str += f" = {total}"
-                    coalitions.append((total, coalition_str))
+        # Zgodne koalicje z większością z silnika koalicji (maski bitowe, graf konfliktów, odcinanie gałęzi)
+        for mask, total in self.coalition_engine.winning_coalitions(mandates):
+            subset = self.coalition_engine.members(mask)
+            # Dla każdej partii w koalicji zbieramy: skrót nazwy, liczbę mandatów oraz krajowe poparcie.
+            coalition_data = []
+            for i in subset:
+                abbr = short_name_mapping.get(self.committees[i].name, self.committees[i].name)
+                coalition_data.append((abbr, mandates[i], national_support[i]))
+            # Sortujemy partie w koalicji – najpierw według mandatów, potem krajowego poparcia
+            coalition_data.sort(key=lambda x: (x[1], x[2]), reverse=True)
+            if len(subset) == 1:
+                coalition_str = f"Samodzielna większość: {coalition_data[0][0]} ({coalition_data[0][1]})"
+            else:
+                coalition_str = "Koalicja: " + "+".join(f"{abbr}({mand})" for abbr, mand, _ in coalition_data)
+                coalition_str += f" = {total}"
+            coalitions.append((total, len(subset), subset, coalition_str))
         # Sortujemy wszystkie koalicje malejąco według sumy mandatów
-        coalitions.sort(key=lambda x: x[0], reverse=True)
-
-        # Usuwamy duplikaty – jeżeli te same partie pojawiły się w koalicji (choć przy kombinacjach nie powinno być powtórzeń)
-        unique_coalitions = []
-        seen = set()
-        for total, coalition_str in coalitions:
-            if coalition_str not in seen:
-                seen.add(coalition_str)
-                unique_coalitions.append(coalition_str)
+        # (przy równej sumie: mniejsze koalicje i kolejność komitetów, jak przy przeglądaniu kombinacji)
+        coalitions.sort(key=lambda x: (-x[0], x[1], x[2]))
 
         # Łączymy wynik w jeden tekst (każda kombinacja w nowej linii)
-        result_text = "\n".join(unique_coalitions)
+        result_text = "\n".join(coalition_str for _, _, _, coalition_str in coalitions)
         if not result_text:
             result_text = "Brak koalicji dających większość"
+        return result_text
+
+    def update_coalitions_widget(self, result_text):
         self.coalitions_text.setText(result_text)
 
     def handle_threshold_change(self, i, index):
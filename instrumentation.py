@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+class StageStats:
+    def __init__(self, window):
+        self.count = 0
+        self.total_ns = 0
+        self.recent = deque(maxlen=window)  # Ostatnie pomiary do percentyli kroczących
+
+    def add(self, duration_ns):
+        self.count += 1
+        self.total_ns += duration_ns
+        self.recent.append(duration_ns)
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Profiler:
+    def __init__(self, enabled=False, window=200, max_events=100000):
+        self.enabled = enabled
+        self.window = window
+        self.stats = {}
+        self.events = deque(maxlen=max_events)
+        self.lock = threading.Lock()  # Etapy mierzymy zarówno w wątku GUI, jak i w wątku roboczym
+        self.origin_ns = time.perf_counter_ns()
+
+    @classmethod
+    def from_environment(cls):
+        # Instrumentacja jest opcjonalna: włączamy ją zmienną środowiskową ELECTIONS_PROFILE=1
+        return cls(enabled=os.environ.get('ELECTIONS_PROFILE', '') not in ('', '0'))
+
+    def stage(self, name):
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name)
+
+    @contextmanager
+    def _stage(self, name):
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start_ns, time.perf_counter_ns() - start_ns)
+
+    def record(self, name, start_ns, duration_ns):
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = StageStats(self.window)
+            stats.add(duration_ns)
+            self.events.append((name, start_ns, duration_ns, threading.get_ident()))
+
+    def summary(self):
+        with self.lock:
+            return {
+                name: {
+                    'count': stats.count,
+                    'mean_ms': stats.total_ns / stats.count / 1e6,
+                    'p50_ms': stats.percentile(50) / 1e6,
+                    'p90_ms': stats.percentile(90) / 1e6,
+                    'p99_ms': stats.percentile(99) / 1e6,
+                }
+                for name, stats in self.stats.items()
+            }
+
+    def overlay_text(self, prefixes=None):
+        # prefixes: tylko etapy o podanych przedrostkach (np. raport startu: 'import.', 'startup.')
+        lines = [f"{'etap':24s} {'n':>5s} {'p50':>8s} {'p90':>8s}"]
+        for name, stats in sorted(self.summary().items()):
+            if prefixes is not None and not name.startswith(tuple(prefixes)):
+                continue
+            lines.append(f"{name:24s} {stats['count']:5d} {stats['p50_ms']:7.2f}ms {stats['p90_ms']:7.2f}ms")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        # Format Trace Event (chrome://tracing, Perfetto): zdarzenia "X" z czasem w mikrosekundach
+        with self.lock:
+            events = list(self.events)
+        trace = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': (start_ns - self.origin_ns) / 1000,
+                'dur': duration_ns / 1000,
+                'pid': os.getpid(),
+                'tid': thread_id,
+            }
+            for name, start_ns, duration_ns, thread_id in events
+        ]
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
+
+    def export_log(self, path):
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'time': time.time(), 'stages': self.summary()}) + '\n')
@@ -1,9 +1,16 @@
-from PySide6.QtWidgets import QApplication
 import sys
-from gui import ElectionApp
+
+from instrumentation import Profiler
 
 if __name__ == "__main__":
+    # Profiler powstaje przed ciężkimi importami, żeby zmierzyć również start (ELECTIONS_PROFILE=1)
+    profiler = Profiler.from_environment()
+    with profiler.stage('import.qt'):
+        from PySide6.QtWidgets import QApplication
+    with profiler.stage('import.gui'):
+        from gui import ElectionApp
     app = QApplication(sys.argv)
-    window = ElectionApp()
+    with profiler.stage('startup.window'):
+        window = ElectionApp(profiler)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
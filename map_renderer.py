@@ -0,0 +1,33 @@
+import re
+
+from bs4 import BeautifulSoup
+
+DISTRICT_ID = re.compile(r'^okreg_(\d+)$')
+MARKER = re.compile(r'@@okreg_(\d+)@@')
+
+
+class MapRenderer:
+    def __init__(self, template_path="okregi.svg"):
+        # Szablon parsujemy raz: style ścieżek okręgów zastępujemy znacznikami i dzielimy wynik na stałe fragmenty
+        with open(template_path, 'r', encoding='utf-8') as file:
+            soup = BeautifulSoup(file.read(), 'xml')
+        self.default_styles = {}
+        for path in soup.find_all('path', id=DISTRICT_ID):
+            number = int(DISTRICT_ID.match(path['id']).group(1))
+            self.default_styles[number] = path.get('style', '')
+            path['style'] = f"@@okreg_{number}@@"
+        parts = MARKER.split(str(soup))
+        self.segments = parts[0::2]
+        self.districts = [int(number) for number in parts[1::2]]
+
+    def render(self, colors):
+        # colors: numer okręgu -> kolor wypełnienia; pozostałe okręgi zachowują styl z szablonu
+        out = [self.segments[0]]
+        for number, segment in zip(self.districts, self.segments[1:]):
+            color = colors.get(number)
+            if color is None:
+                out.append(self.default_styles[number])
+            else:
+                out.append(f'fill:{color};stroke:#000000;stroke-width:1px;')
+            out.append(segment)
+        return ''.join(out).encode('utf-8')
@@ -1,4 +1,9 @@
+import numpy as np
+
+
 class Committee:
+    __slots__ = ('id', 'name', 'threshold', 'pastSupportEquivalence')
+
     def __init__(self, id, name, threshold, pastSupportEquivalence):
         self.id = id
         self.name = name
@@ -6,9 +11,159 @@ class Committee:
         self.pastSupportEquivalence = pastSupportEquivalence
 
 class Constituency:
+    __slots__ = ('number', 'size', 'pastSupport', 'support', 'mandates')
+
     def __init__(self, number, size, pastSupport):
         self.number = number
         self.size = size
         self.pastSupport = pastSupport
         self.support = None
-        self.mandates = None
\ No newline at end of file
+        self.mandates = None
+
+class ConstituencySet:
+    # Okręgi w układzie kolumnowym: numery, liczby mandatów i wyniki z przeszłości w ciągłych tablicach,
+    # wyniki przeliczeń w buforach okręgi x komitety nadpisywanych w miejscu. Zachowuje się jak lista
+    # okręgów - indeksowanie i iteracja zwracają lekkie widoki ConstituencyView.
+    __slots__ = ('numbers', 'sizes', 'parties', 'past_support', 'valid_votes', 'support', 'mandates',
+                 'extra_support', '_party_index')
+
+    def __init__(self, numbers, sizes, parties, past_support, valid_votes=None):
+        self.numbers = np.asarray(numbers, dtype=np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.parties = list(parties)
+        self.past_support = np.ascontiguousarray(past_support, dtype=float).reshape(self.numbers.size, len(parties))
+        # Liczba głosów ważnych w okręgach (tryb dokładny kalkulatora), jeśli dane ją zawierają
+        self.valid_votes = None if valid_votes is None else np.asarray(valid_votes, dtype=float)
+        self.support = None  # Bufory wyników (okręgi x komitety), tworzone przy pierwszym zapisie
+        self.mandates = None
+        self.extra_support = [()] * self.numbers.size  # Poparcie spoza listy komitetów, np. MN w okręgu 21
+        self._party_index = {party: i for i, party in enumerate(self.parties)}
+
+    @classmethod
+    def from_constituencies(cls, constituencies):
+        parties = list(constituencies[0].pastSupport) if constituencies else []
+        return cls(
+            [c.number for c in constituencies],
+            [c.size for c in constituencies],
+            parties,
+            [[c.pastSupport.get(party, 0) for party in parties] for c in constituencies],
+        )
+
+    def __len__(self):
+        return self.numbers.size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [ConstituencyView(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return ConstituencyView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield ConstituencyView(self, row)
+
+    def index(self, constituency):
+        if isinstance(constituency, ConstituencyView) and constituency.owner is self:
+            return constituency.row
+        for row, number in enumerate(self.numbers.tolist()):
+            if number == constituency.number:
+                return row
+        raise ValueError("Okręg {} nie należy do zbioru".format(constituency.number))
+
+    def past_support_matrix(self, party_ids):
+        # Okręgi x podane komitety; brakujące w danych komitety mają zerowe poparcie
+        columns = [self._party_index.get(party) for party in party_ids]
+        result = np.zeros((len(self), len(columns)))
+        for i, column in enumerate(columns):
+            if column is not None:
+                result[:, i] = self.past_support[:, column]
+        return result
+
+    def ensure_buffers(self, committees):
+        if self.support is None or self.support.shape[1] != committees:
+            self.support = np.full((len(self), committees), np.nan)
+            self.mandates = np.full((len(self), committees), -1, dtype=np.int64)  # -1: jeszcze nie przeliczony
+
+    def store(self, local_matrix, constituency_mandates=None, rows=None, extra_support=None):
+        # Zapis wyników przeliczenia do buforów; rows - tylko wybrane okręgi (przeliczenie przyrostowe)
+        self.ensure_buffers(local_matrix.shape[-1])
+        self.support[...] = local_matrix
+        if constituency_mandates is not None:
+            if rows is None:
+                self.mandates[...] = constituency_mandates
+            else:
+                self.mandates[rows] = constituency_mandates[rows]
+        if extra_support is not None:
+            self.extra_support = extra_support
+
+class ConstituencyView:
+    # Dostęp do jednego okręgu ze zbioru; wartości czytane z tablic w chwili odwołania
+    __slots__ = ('owner', 'row')
+
+    def __init__(self, owner, row):
+        self.owner = owner
+        self.row = row
+
+    def __eq__(self, other):
+        return isinstance(other, ConstituencyView) and other.owner is self.owner and other.row == self.row
+
+    def __hash__(self):
+        return hash((id(self.owner), self.row))
+
+    @property
+    def number(self):
+        return int(self.owner.numbers[self.row])
+
+    @property
+    def size(self):
+        return int(self.owner.sizes[self.row])
+
+    @property
+    def pastSupport(self):
+        return dict(zip(self.owner.parties, self.owner.past_support[self.row].tolist()))
+
+    @property
+    def support(self):
+        owner = self.owner
+        if owner.support is None or np.isnan(owner.support[self.row, 0]):
+            return None
+        return owner.support[self.row].tolist() + list(owner.extra_support[self.row])
+
+    @support.setter
+    def support(self, values):
+        owner = self.owner
+        values = list(values)
+        if owner.support is None:
+            raise ValueError("Brak buforów wyników - najpierw ConstituencySet.store")
+        columns = owner.support.shape[1]
+        owner.support[self.row] = values[:columns]
+        if tuple(values[columns:]) != tuple(owner.extra_support[self.row]):
+            extra_support = list(owner.extra_support)
+            extra_support[self.row] = tuple(values[columns:])
+            owner.extra_support = extra_support
+
+    @property
+    def mandates(self):
+        owner = self.owner
+        if owner.mandates is None or owner.mandates[self.row, 0] < 0:
+            return None
+        return owner.mandates[self.row].tolist()
+
+    @mandates.setter
+    def mandates(self, values):
+        if self.owner.mandates is None:
+            raise ValueError("Brak buforów wyników - najpierw ConstituencySet.store")
+        self.owner.mandates[self.row] = values
+
+def default_committees():
+    # Komitety z wyborów do Sejmu 2023 (kolejność zgodna z kolumnami wybory2023.csv)
+    return [
+        Committee('td', 'Trzecia Droga', 5, [['td', 1]]),
+        Committee('nl', 'Lewica', 5, [['nl', 1]]),
+        Committee('pis', 'Prawo i Sprawiedliwość', 5, [['pis', 1]]),
+        Committee('konf', 'Konfederacja', 5, [['konf', 1]]),
+        Committee('ko', 'Koalicja Obywatelska', 5, [['ko', 1]])
+    ]
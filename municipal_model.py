@@ -0,0 +1,89 @@
+import numpy as np
+
+from data_loader import load_table
+
+
+class MunicipalityModel:
+    def __init__(self, table, committees, constituencies, iterations=100, tolerance=1e-9):
+        # table: ElectionTable z wynikami w gminach (lub powiatach): numer okręgu sejmowego i liczby głosów
+        # komitetów; kolumny spoza listy komitetów (np. MN) tworzą łącznie grupę "pozostali"
+        self.committee_ids = [committee.id for committee in committees]
+        self.iterations = iterations
+        self.tolerance = tolerance
+
+        number_column = 'sejm_number' if table.has_column('sejm_number') else 'number'
+        unit_numbers = np.asarray(table.column(number_column)).astype(int)
+        rows = {constituency.number: row for row, constituency in enumerate(constituencies)}
+        unit_rows = np.array([rows.get(number, -1) for number in unit_numbers.tolist()])
+        keep = unit_rows >= 0
+
+        votes = np.asarray(table.support, dtype=float)[keep]
+        columns = [table.parties.index(committee_id) if committee_id in table.parties else None
+                   for committee_id in self.committee_ids]
+        committee_votes = np.column_stack([
+            votes[:, column] if column is not None else np.zeros(votes.shape[0]) for column in columns
+        ])
+        other_columns = [i for i, party in enumerate(table.parties) if party not in self.committee_ids]
+        other_votes = votes[:, other_columns].sum(axis=1) if other_columns else np.zeros(votes.shape[0])
+        valid = committee_votes.sum(axis=1) + other_votes
+
+        # Udziały z przeszłości w każdej jednostce: komitety + "pozostali" w ostatniej kolumnie
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.past_shares = np.where(
+                valid[:, None] > 0, np.column_stack([committee_votes, other_votes]) / valid[:, None], 0.0
+            )
+        self.weights = valid / valid.sum()  # Waga jednostki w wyniku krajowym
+
+        # Agregacja do okręgów: okręgi x jednostki, udział jednostki w głosach ważnych okręgu
+        unit_rows = unit_rows[keep]
+        constituency_valid = np.bincount(unit_rows, weights=valid, minlength=len(constituencies))
+        self.aggregation = np.zeros((len(constituencies), unit_rows.size))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.aggregation[unit_rows, np.arange(unit_rows.size)] = valid / constituency_valid[unit_rows]
+        self._last_factors = None  # Punkt startowy dopasowania dla kolejnego, zwykle podobnego wektora
+
+    @classmethod
+    def from_file(cls, file_path, committees, constituencies, use_cache=True):
+        return cls(load_table(file_path, use_cache), committees, constituencies)
+
+    def fit(self, supports):
+        # Mnożniki komitetów (..., komitety + pozostali) dopasowane tak, żeby wynik krajowy zgadzał się
+        # z `supports`. Udział w jednostce to udział z przeszłości razy mnożnik, normowany do 1 w jednostce -
+        # nie ma przekroczeń 100% jak przy czysto proporcjonalnym przesunięciu. Iteracje operują tylko na
+        # sumach (mnożenia macierzy jednostki x komitety), bez tablic scenariusze x jednostki x komitety.
+        supports = np.asarray(supports, dtype=float) / 100
+        # Suma ponad 100% (np. w trakcie przesuwania suwaków) - dopasowujemy proporcje, a skalę
+        # przywraca local_support_matrix
+        total = supports.sum(axis=-1, keepdims=True)
+        supports = supports / np.maximum(total, 1.0)
+        targets = np.concatenate([supports, np.maximum(1 - total, 0.0)], axis=-1)
+        factors = np.ones(targets.shape)
+        if self._last_factors is not None and supports.ndim == 1:
+            factors = self._last_factors.copy()
+        factors = np.where(targets > 0, np.where(factors > 0, factors, 1.0), 0.0)
+
+        for _ in range(self.iterations):
+            denominators = factors @ self.past_shares.T  # (..., jednostki)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weights = np.where(denominators > 0, self.weights / denominators, 0.0)
+                achieved = factors * (weights @ self.past_shares)
+                ratio = np.where(achieved > 0, targets / achieved, 1.0)
+            if np.all(np.abs(ratio - 1) < self.tolerance):
+                break
+            factors = factors * ratio
+        if supports.ndim == 1:
+            self._last_factors = factors
+        return factors
+
+    def unit_shares(self, supports):
+        # Udziały w jednostkach (..., jednostki, komitety + pozostali)
+        factors = self.fit(supports)
+        weighted = self.past_shares * factors[..., None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.nan_to_num(weighted / weighted.sum(axis=-1, keepdims=True))
+
+    def local_support_matrix(self, supports):
+        # Suma głosów z jednostek w okręgu, w procentach głosów ważnych okręgu (bez kolumny "pozostali")
+        scale = np.maximum(np.asarray(supports, dtype=float).sum(axis=-1) / 100, 1.0)[..., None, None]
+        shares = self.unit_shares(supports)[..., :-1]
+        return 100 * scale * np.matmul(self.aggregation, shares)
@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator, available_methods
+from coalitions import CoalitionEngine, DEFAULT_CONFLICTS
+from municipal_model import MunicipalityModel
+from simulation import MonteCarloSimulator, simulate_chunk
+from cli import parse_scenario
+
+METHODS = available_methods()
+MAX_BODY = 16 * 1024 * 1024
+MAX_DRAWS = 1000000
+MAX_CHUNKS = 1000  # Górna granica liczby paczek losowań (zadań w puli) na jedno żądanie
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+_worker = None
+
+
+def _init_worker(data_path, units_path):
+    # Każdy proces wczytuje dane raz (z pamięci podręcznej .npy) i trzyma własny kalkulator
+    global _worker
+    committees = default_committees()
+    constituencies = load_constituencies(data_path)
+    projection = MunicipalityModel.from_file(units_path, committees, constituencies) if units_path else None
+    _worker = ElectionCalculator(committees, constituencies, projection=projection)
+
+
+def _set_thresholds(calculator, thresholds):
+    # Zadania w procesie wykonują się po kolei, więc progi można ustawiać na wspólnych komitetach
+    for committee, threshold in zip(calculator.committees, thresholds):
+        committee.threshold = threshold
+
+
+def _calculate_batch(method, thresholds, supports, per_constituency):
+    _set_thresholds(_worker, thresholds)
+    return _worker.calculate_mandates_batch(supports, method, per_constituency=per_constituency)
+
+
+def _simulate(settings, thresholds, seed, draws):
+    _set_thresholds(_worker, thresholds)
+    return simulate_chunk(_worker, settings, seed, draws)
+
+
+class ScenarioBatcher:
+    def __init__(self, service, window=0.002, max_batch=512):
+        # Pojedyncze scenariusze z tą samą metodą i progami zbieramy przez `window` sekund (albo do max_batch)
+        # i liczymy jednym wywołaniem calculate_mandates_batch w procesie roboczym
+        self.service = service
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = {}
+
+    def submit(self, support, method, thresholds, per_constituency):
+        loop = asyncio.get_running_loop()
+        key = (method, thresholds, per_constituency)
+        future = loop.create_future()
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = []
+            loop.call_later(self.window, self.flush, key)
+        batch.append((support, future))
+        if len(batch) >= self.max_batch:
+            self.flush(key)
+        return future
+
+    def flush(self, key):
+        batch = self.pending.pop(key, None)
+        if batch:
+            asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        method, thresholds, per_constituency = key
+        try:
+            result = await self.service.run_in_pool(
+                _calculate_batch, method, thresholds, [support for support, _ in batch], per_constituency
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if per_constituency:
+            mandates, constituency_mandates = result
+        else:
+            mandates, constituency_mandates = result, [None] * len(batch)
+        for (_, future), row, constituency_row in zip(batch, mandates, constituency_mandates):
+            if not future.done():
+                future.set_result((row, constituency_row))
+
+
+class SeatService:
+    def __init__(self, data_path='wybory2023.csv', units_path=None, workers=None, batch_window=0.002,
+                 max_batch=512, conflicts=DEFAULT_CONFLICTS):
+        self.committees = default_committees()
+        self.ids = [committee.id for committee in self.committees]
+        self.constituencies = load_constituencies(data_path)
+        self.numbers = self.constituencies.numbers.tolist()
+        self.coalition_engine = CoalitionEngine(self.ids, conflicts)
+        self.conflicts = conflicts
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(data_path, units_path)
+        )
+        self.batcher = ScenarioBatcher(self, batch_window, max_batch)
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/seats'): self.seats,
+            ('POST', '/seats/batch'): self.seats_batch,
+            ('POST', '/simulate'): self.simulate,
+            ('POST', '/coalitions'): self.coalitions,
+        }
+
+    def run_in_pool(self, function, *args):
+        return asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    # --- Parametry żądań ---
+
+    def method(self, request, default="dHondt"):
+        method = request.get('method') or default
+        if method not in METHODS:
+            raise ValueError("Nieznana metoda: {}".format(method))
+        return method
+
+    def thresholds(self, values, defaults=None):
+        # Progi jako krotka w kolejności komitetów: domyślne z models, nadpisane słownikiem id -> próg
+        thresholds = dict(defaults or {})
+        if values is not None and not isinstance(values, dict):
+            raise ValueError("Progi muszą być obiektem JSON: id komitetu -> próg")
+        for committee_id, threshold in (values or {}).items():
+            if committee_id not in self.ids:
+                raise ValueError("Nieznany komitet: {}".format(committee_id))
+            thresholds[committee_id] = float(threshold)
+        return tuple(thresholds.get(c.id, c.threshold) for c in self.committees)
+
+    def seats_payload(self, mandates, constituency_mandates=None):
+        payload = {'mandates': dict(zip(self.ids, np.asarray(mandates).tolist()))}
+        if constituency_mandates is not None:
+            payload['constituencies'] = [
+                {'number': number, 'mandates': dict(zip(self.ids, row))}
+                for number, row in zip(self.numbers, np.asarray(constituency_mandates).tolist())
+            ]
+        return payload
+
+    def coalitions_payload(self, seats):
+        seats = [int(seats[committee_id]) for committee_id in self.ids]
+        return {
+            'minimal': [
+                {'members': self.coalition_engine.member_ids(mask), 'seats': total}
+                for mask, total in self.coalition_engine.minimal_winning_coalitions(seats)
+            ],
+            'winning': [
+                {'members': self.coalition_engine.member_ids(mask), 'seats': total}
+                for mask, total in self.coalition_engine.winning_coalitions(seats)
+            ],
+        }
+
+    # --- Punkty końcowe ---
+
+    async def health(self, request):
+        return {'status': 'ok', 'committees': self.ids, 'methods': METHODS, 'workers': self.workers}
+
+    async def seats(self, request):
+        scenario = parse_scenario(request, 0, self.committees)
+        method = self.method(request)
+        thresholds = self.thresholds(scenario['thresholds'])
+        per_constituency = bool(request.get('per_constituency', False))
+        mandates, constituency_mandates = await self.batcher.submit(
+            scenario['support'], method, thresholds, per_constituency
+        )
+        payload = self.seats_payload(mandates, constituency_mandates)
+        payload['method'] = method
+        return payload
+
+    async def seats_batch(self, request):
+        # Scenariusze z tą samą metodą i progami liczymy razem; duże grupy dzielimy między procesy
+        default_method = self.method(request)
+        default_thresholds = self.thresholds(request.get('thresholds'))
+        default_thresholds = dict(zip(self.ids, default_thresholds))
+        per_constituency = bool(request.get('per_constituency', False))
+        scenarios = [parse_scenario(row, number, self.committees)
+                     for number, row in enumerate(request['scenarios'])]
+
+        groups = {}
+        for position, scenario in enumerate(scenarios):
+            method = self.method(scenario, default_method)
+            key = (method, self.thresholds(scenario['thresholds'], default_thresholds))
+            groups.setdefault(key, []).append(position)
+
+        chunk = self.batcher.max_batch
+        jobs, slices = [], []
+        for (method, thresholds), positions in groups.items():
+            for start in range(0, len(positions), chunk):
+                part = positions[start:start + chunk]
+                jobs.append(self.run_in_pool(
+                    _calculate_batch, method, thresholds, [scenarios[i]['support'] for i in part], per_constituency
+                ))
+                slices.append((method, part))
+
+        results = [None] * len(scenarios)
+        for (method, part), result in zip(slices, await asyncio.gather(*jobs)):
+            mandates, constituency_mandates = result if per_constituency else (result, [None] * len(part))
+            for position, row, constituency_row in zip(part, mandates, constituency_mandates):
+                payload = self.seats_payload(row, constituency_row)
+                payload['id'] = scenarios[position]['id']
+                payload['method'] = method
+                results[position] = payload
+        return {'results': results}
+
+    async def simulate(self, request):
+        poll_mean = parse_scenario({'support': request['poll_mean']}, 0, self.committees)['support']
+        draws = int(request.get('draws', 10000))
+        if not 0 < draws <= MAX_DRAWS:
+            raise ValueError("Liczba losowań musi być z przedziału 1..{}".format(MAX_DRAWS))
+        chunk_size = int(request.get('chunk_size', 5000))
+        if not 0 < chunk_size <= MAX_DRAWS:
+            raise ValueError("Wielkość paczki losowań musi być z przedziału 1..{}".format(MAX_DRAWS))
+        # Małe paczki przy wielu losowaniach powiększamy, żeby nie tworzyć milionów zadań naraz
+        chunk_size = max(chunk_size, -(-draws // MAX_CHUNKS))
+        simulator = MonteCarloSimulator(
+            self.committees, self.constituencies, method=self.method(request),
+            error_model=request.get('error_model', 'normal'), sigma=float(request.get('sigma', 1.0)),
+            concentration=float(request.get('concentration', 500.0)),
+            local_sigma=float(request.get('local_sigma', 0.0)), workers=self.workers,
+            chunk_size=chunk_size, conflicts=self.conflicts,
+        )
+        thresholds = self.thresholds(request.get('thresholds'))
+        # Paczki losowań równolegle w procesach roboczych; ziarna paczek jak w MonteCarloSimulator.run
+        jobs = [
+            self.run_in_pool(_simulate, settings, thresholds, seed, chunk_draws)
+            for settings, seed, chunk_draws in simulator.tasks(poll_mean, draws, int(request.get('seed', 0)))
+        ]
+        result = None
+        for chunk in await asyncio.gather(*jobs):
+            result = chunk if result is None else result.merge(chunk)
+
+        majority = self.coalition_engine.majority
+        return {
+            'draws': result.draws,
+            'mean_seats': dict(zip(self.ids, result.mean_seats().tolist())),
+            'majority_probability': dict(zip(self.ids, result.majority_probability(majority).tolist())),
+            'coalitions': [
+                {'members': self.coalition_engine.member_ids(mask), 'probability': probability}
+                for mask, probability in result.coalition_probability().items()
+            ],
+        }
+
+    async def coalitions(self, request):
+        # Koalicje dla podanego podziału mandatów albo dla scenariusza poparcia
+        if 'seats' in request:
+            seats = {committee_id: int(request['seats'].get(committee_id, 0)) for committee_id in self.ids}
+        else:
+            seats = (await self.seats(request))['mandates']
+        payload = self.coalitions_payload(seats)
+        payload['seats'] = seats
+        return payload
+
+    # --- HTTP ---
+
+    async def dispatch(self, method, path, body):
+        handler = self.routes.get((method, path.split('?', 1)[0]))
+        if handler is None:
+            if any(route_path == path.split('?', 1)[0] for _, route_path in self.routes):
+                return 405, {'error': "Niedozwolona metoda: {}".format(method)}
+            return 404, {'error': "Nieznany adres: {}".format(path)}
+        try:
+            request = json.loads(body) if body else {}
+            if not isinstance(request, dict):
+                raise ValueError("Treść żądania musi być obiektem JSON")
+            return 200, await handler(request)
+        except KeyError as e:
+            return 400, {'error': "Brak pola: {}".format(e.args[0])}
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': "Błąd obliczeń: {}".format(e)}
+
+    async def handle_connection(self, reader, writer):
+        # Minimalny HTTP/1.1 z utrzymywaniem połączenia; treść i odpowiedzi w JSON
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = len(parts) == 3 and parts[2] == 'HTTP/1.1' and \
+                    headers.get('connection', '').lower() != 'close'
+                length = int(headers.get('content-length', 0) or 0)
+                if len(parts) != 3:
+                    status, payload, keep_alive = 400, {'error': "Niepoprawne żądanie"}, False
+                elif length > MAX_BODY:
+                    status, payload, keep_alive = 413, {'error': "Za duże żądanie"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.dispatch(parts[0], parts[1], body)
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    "HTTP/1.1 {} {}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                    "Content-Length: {}\r\nConnection: {}\r\n\r\n".format(
+                        status, REASONS[status], len(data), 'keep-alive' if keep_alive else 'close'
+                    ).encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        # Procesy robocze uruchamiamy od razu, żeby pierwsze żądanie nie czekało na wczytanie danych
+        await asyncio.gather(*[self.run_in_pool(int, 0) for _ in range(self.workers)])
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalna usługa HTTP/JSON kalkulatora mandatów")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8023)
+    parser.add_argument('--data', default='wybory2023.csv', help="wyniki historyczne w okręgach")
+    parser.add_argument('--units', help="wyniki w gminach/powiatach: poparcie przenoszone na jednostki i sumowane w okręgach")
+    parser.add_argument('--workers', type=int, help="liczba procesów roboczych, domyślnie liczba rdzeni")
+    parser.add_argument('--batch-window', type=float, default=2.0, help="czas zbierania pojedynczych scenariuszy (ms)")
+    parser.add_argument('--max-batch', type=int, default=512)
+    args = parser.parse_args(argv)
+
+    service = SeatService(args.data, args.units, args.workers, args.batch_window / 1000, args.max_batch)
+    print("Nasłuchiwanie na http://{}:{}".format(args.host, args.port))
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
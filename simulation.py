@@ -0,0 +1,153 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from calculator import ElectionCalculator
+from coalitions import CoalitionEngine, DEFAULT_CONFLICTS, MAJORITY
+
+_worker_calculator = None
+
+
+def _init_worker(committees, constituencies):
+    # Każdy proces buduje własny kalkulator raz, a nie przy każdej paczce losowań
+    global _worker_calculator
+    _worker_calculator = ElectionCalculator(committees, constituencies)
+
+
+def _simulate_chunk(task):
+    settings, seed, draws = task
+    return simulate_chunk(_worker_calculator, settings, seed, draws)
+
+
+def sample_national_support(rng, poll_mean, draws, error_model="normal", sigma=1.0, concentration=500.0):
+    poll_mean = np.asarray(poll_mean, dtype=float)
+    if error_model == "normal":
+        support = poll_mean + rng.standard_normal((draws, poll_mean.size)) * np.asarray(sigma, dtype=float)
+        return np.clip(support, 0.0, None)
+    elif error_model == "dirichlet":
+        # Udziały losowane wokół średniej sondażowej; im większa koncentracja, tym mniejszy rozrzut
+        total = poll_mean.sum()
+        shares = rng.dirichlet(poll_mean / total * concentration, size=draws)
+        return shares * total
+    else:
+        raise ValueError("Nieznany model błędu: {}".format(error_model))
+
+
+def simulate_chunk(calculator, settings, seed, draws):
+    rng = np.random.default_rng(seed)
+    support = sample_national_support(
+        rng, settings['poll_mean'], draws, settings['error_model'], settings['sigma'], settings['concentration']
+    )
+    local_matrix = calculator.local_support_matrix(support)
+    if settings['local_sigma'] > 0:
+        noise = 1.0 + settings['local_sigma'] * rng.standard_normal(local_matrix.shape)
+        local_matrix *= np.clip(noise, 0.0, None)
+    constituency_mandates = calculator.allocate(calculator.apply_thresholds(support, local_matrix), settings['method'])
+    engine = CoalitionEngine([c.id for c in calculator.committees], settings['conflicts'])
+    return SimulationResult.from_draws(constituency_mandates, settings['total_mandates'], engine)
+
+
+class SimulationResult:
+    def __init__(self, draws, seat_counts, district_wins, seat_sums, coalition_counts=None):
+        self.draws = draws
+        self.seat_counts = seat_counts        # komitety x (0..liczba mandatów): liczba losowań z daną liczbą mandatów
+        self.district_wins = district_wins    # okręgi x komitety: ile razy komitet wygrał okręg
+        self.seat_sums = seat_sums            # komitety: suma mandatów ze wszystkich losowań
+        self.coalition_counts = coalition_counts if coalition_counts is not None else Counter()  # maska: liczba losowań
+
+    @classmethod
+    def from_draws(cls, constituency_mandates, total_mandates, engine=None):
+        draws, n_constituencies, n_committees = constituency_mandates.shape
+        mandates = constituency_mandates.sum(axis=1)
+        seat_counts = np.stack([
+            np.bincount(mandates[:, i], minlength=total_mandates + 1) for i in range(n_committees)
+        ])
+        # Zwycięzca okręgu jak w ElectionApp.get_winners: pierwszy komitet z największą liczbą mandatów
+        winners = constituency_mandates.argmax(axis=2)
+        district_wins = np.zeros((n_constituencies, n_committees), dtype=np.int64)
+        for i in range(n_committees):
+            district_wins[:, i] = (winners == i).sum(axis=0)
+        # Minimalne zwycięskie koalicje w każdym losowaniu
+        coalition_counts = engine.frequencies(mandates) if engine is not None else None
+        return cls(draws, seat_counts, district_wins, mandates.sum(axis=0), coalition_counts)
+
+    def merge(self, other):
+        return SimulationResult(
+            self.draws + other.draws,
+            self.seat_counts + other.seat_counts,
+            self.district_wins + other.district_wins,
+            self.seat_sums + other.seat_sums,
+            self.coalition_counts + other.coalition_counts,
+        )
+
+    def seat_distribution(self):
+        return self.seat_counts / self.draws
+
+    def mean_seats(self):
+        return self.seat_sums / self.draws
+
+    def majority_probability(self, majority=MAJORITY):
+        return self.seat_counts[:, majority:].sum(axis=1) / self.draws
+
+    def district_win_probability(self):
+        return self.district_wins / self.draws
+
+    def coalition_probability(self):
+        # Maska koalicji -> odsetek losowań, w których jest minimalną koalicją z większością
+        return {mask: count / self.draws for mask, count in self.coalition_counts.most_common()}
+
+
+class MonteCarloSimulator:
+    def __init__(self, committees, constituencies, method="dHondt", error_model="normal", sigma=1.0,
+                 concentration=500.0, local_sigma=0.0, workers=None, chunk_size=5000, conflicts=DEFAULT_CONFLICTS):
+        self.committees = committees
+        self.constituencies = constituencies
+        self.calculator = ElectionCalculator(committees, constituencies)
+        self.method = method
+        self.error_model = error_model
+        self.sigma = sigma
+        self.concentration = concentration
+        self.local_sigma = local_sigma
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.conflicts = conflicts
+        self.coalition_engine = CoalitionEngine([c.id for c in committees], conflicts)
+
+    def settings(self, poll_mean):
+        return {
+            'poll_mean': list(poll_mean),
+            'method': self.method,
+            'error_model': self.error_model,
+            'sigma': self.sigma,
+            'concentration': self.concentration,
+            'local_sigma': self.local_sigma,
+            'total_mandates': sum(c.size for c in self.constituencies),
+            'conflicts': list(self.conflicts),
+        }
+
+    def tasks(self, poll_mean, draws, seed):
+        # Ziarna paczek zależą tylko od seed i numeru paczki, więc wynik nie zależy od liczby procesów
+        settings = self.settings(poll_mean)
+        n_chunks = -(-draws // self.chunk_size)
+        seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+        for i, chunk_seed in enumerate(seeds):
+            chunk_draws = min(self.chunk_size, draws - i * self.chunk_size)
+            yield settings, chunk_seed, chunk_draws
+
+    def run(self, poll_mean, draws=100000, seed=0):
+        result = None
+        if self.workers <= 1:
+            for settings, chunk_seed, chunk_draws in self.tasks(poll_mean, draws, seed):
+                chunk = simulate_chunk(self.calculator, settings, chunk_seed, chunk_draws)
+                result = chunk if result is None else result.merge(chunk)
+            return result
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(self.committees, self.constituencies),
+        ) as executor:
+            for chunk in executor.map(_simulate_chunk, self.tasks(poll_mean, draws, seed)):
+                result = chunk if result is None else result.merge(chunk)
+        return result
@@ -0,0 +1,94 @@
+import numpy as np
+
+from allocation import DIVISOR_METHODS, divisor_table
+
+
+class SeatTargetSolver:
+    def __init__(self, calculator):
+        self.calculator = calculator
+
+    def minimal_support(self, support, party, target, coalition=None, method="dHondt", max_support=100.0,
+                        tolerance=1e-6):
+        # Najmniejsze krajowe poparcie komitetu `party` (przy stałym poparciu pozostałych), przy którym
+        # komitety z `coalition` (domyślnie sam `party`) mają łącznie co najmniej `target` mandatów.
+        # Zwraca wartość graniczną - wynik osiąga się po jej przekroczeniu - albo None, jeśli cel jest
+        # nieosiągalny do max_support.
+        ids = [committee.id for committee in self.calculator.committees]
+        coalition = [party] if coalition is None else list(coalition)
+        if party not in coalition:
+            raise ValueError("Komitet {} musi należeć do koalicji".format(party))
+        for committee_id in coalition:
+            if committee_id not in ids:
+                raise ValueError("Nieznany komitet: {}".format(committee_id))
+        index = ids.index(party)
+        members = np.isin(ids, coalition)
+        support = np.array(support, dtype=float)
+
+        if method in DIVISOR_METHODS and self.calculator.projection is None and not self.calculator.exact:
+            result = self._divisor_breakpoints(support, index, members, target, DIVISOR_METHODS[method])
+        else:
+            result = self._bisection(support, index, members, target, method, max_support, tolerance)
+        if result is None or result > max_support:
+            return None
+        return result
+
+    def _divisor_breakpoints(self, support, index, members, target, divisors):
+        # Mandaty są schodkową funkcją poparcia: w okręgu komitet dostaje k-ty mandat, gdy jego k-ty kwocjent
+        # przekroczy (size-k+1)-szy największy kwocjent pozostałych komitetów. Wyznaczamy wszystkie takie
+        # punkty przejścia i przesuwamy się po nich w kolejności rosnącej, zamiast wielokrotnie liczyć podział.
+        calculator = self.calculator
+        support[index] = 0.0
+        local_matrix = calculator.local_support_matrix(support)
+        filtered = calculator.apply_thresholds(support, local_matrix)
+        sizes = calculator.constituency_sizes()
+        slopes = calculator.support_slopes()[:, index]
+        table = divisor_table(divisors, int(sizes.max()))
+
+        seats = 0
+        positions, deltas = [], []
+        others = np.flatnonzero(np.arange(filtered.shape[1]) != index)
+        for row, size in enumerate(sizes.tolist()):
+            # Kwocjenty pozostałych komitetów w kolejności przydziału (remisy jak w allocate_divisor)
+            quotients = filtered[row, others][None, :] / table[:size, None]
+            order = np.argsort(-quotients, axis=None, kind='stable')[:size]
+            top = quotients.ravel()[order]
+            owners = others[order % others.size]
+            seats += int(members[owners].sum())
+            if slopes[row] <= 0:
+                continue
+            for k in range(1, size + 1):
+                # Odebrany zostaje najsłabszy zwycięski kwocjent pozostałych: pozycja size-k
+                positions.append(top[size - k] * table[k - 1] / slopes[row])
+                deltas.append(1 - int(members[owners[size - k]]))
+
+        if seats >= target:
+            return 0.0
+        threshold = calculator.committees[index].threshold
+        positions = np.maximum(np.array(positions), threshold)  # Pod progiem komitet nie dostaje mandatów
+        order = np.argsort(positions, kind='stable')
+        reached = seats + np.cumsum(np.array(deltas)[order])
+        hits = np.flatnonzero(reached >= target)
+        if hits.size == 0:
+            return None
+        return float(positions[order[hits[0]]])
+
+    def _bisection(self, support, index, members, target, method, max_support, tolerance, points=64):
+        # Metody bez kwocjentów (Hare-Niemeyer), nieliniowe modele poparcia i tryb dokładny: w każdym kroku sprawdzamy paczkę punktów jednym
+        # wywołaniem calculate_mandates_batch i zawężamy przedział do pierwszego, który osiąga cel
+        calculator = self.calculator
+        low, high = 0.0, max_support
+
+        def seats(values):
+            candidates = np.repeat(support[None, :], len(values), axis=0)
+            candidates[:, index] = values
+            return calculator.calculate_mandates_batch(candidates, method)[:, members].sum(axis=1)
+
+        if seats([low])[0] >= target:
+            return 0.0
+        if seats([high])[0] < target:
+            return None
+        while high - low > tolerance:
+            values = np.linspace(low, high, points)
+            first = int(np.argmax(seats(values) >= target))
+            low, high = values[first - 1], values[first]
+        return float(high)
@@ -0,0 +1,366 @@
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+
+import numpy as np
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator, available_methods
+from coalitions import CoalitionEngine
+from simulation import SimulationResult
+from cli import ResultWriter, parse_thresholds
+
+METHODS = available_methods()
+_END = object()  # Koniec strumienia w kolejkach między wątkami
+
+
+class GridSpec:
+    def __init__(self, committees, values):
+        # values: id komitetu -> wartości poparcia na siatce; komitety bez wartości mają stałe 0
+        self.ids = [committee.id for committee in committees]
+        self.axes = [np.asarray(values.get(committee_id, [0.0]), dtype=float) for committee_id in self.ids]
+        self.shape = tuple(axis.size for axis in self.axes)
+        self.size = int(np.prod(self.shape))
+
+    @classmethod
+    def parse(cls, specs, committees):
+        # Format: id=start:stop:krok (stop włącznie) albo id=wartość, np. td=5:20:0.5 ko=30
+        ids = {committee.id for committee in committees}
+        values = {}
+        for spec in specs:
+            committee_id, _, text = spec.partition('=')
+            if committee_id not in ids or not text:
+                raise ValueError("Niepoprawna siatka: {}".format(spec))
+            parts = [float(part.replace(',', '.')) for part in text.split(':')]
+            if len(parts) == 1:
+                values[committee_id] = parts
+            elif len(parts) == 3 and parts[2] > 0:
+                start, stop, step = parts
+                count = int(np.floor((stop - start) / step + 1e-9)) + 1
+                values[committee_id] = np.round(start + step * np.arange(max(count, 0)), 10)
+            else:
+                raise ValueError("Niepoprawna siatka: {}".format(spec))
+        return cls(committees, values)
+
+    def signature(self):
+        return {'grid': [axis.tolist() for axis in self.axes]}
+
+    def chunks(self, chunk_size, start=0, first_row=0):
+        # Wiersz siatki wyznaczamy z jego numeru, więc w pamięci jest tylko bieżąca paczka,
+        # a wznowienie od wiersza `start` nie wymaga przechodzenia wcześniejszych
+        for first in range(start, self.size, chunk_size):
+            index = np.arange(first, min(first + chunk_size, self.size))
+            positions = np.unravel_index(index, self.shape)
+            supports = np.column_stack([axis[position] for axis, position in zip(self.axes, positions)])
+            yield index.astype(str).tolist(), supports, int(index[-1]) + 1
+
+
+class CsvSource:
+    def __init__(self, path, committees):
+        self.path = path
+        self.ids = [committee.id for committee in committees]
+
+    def signature(self):
+        stat = os.stat(self.path)
+        return {'input': os.path.abspath(self.path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def chunks(self, chunk_size, start=0, first_row=0):
+        # Plik czytamy binarnie, żeby znać pozycję po każdej paczce (do wznowienia); start - pozycja w bajtach,
+        # first_row - numer pierwszego wiersza (identyfikator scenariusza, gdy plik nie ma kolumny id)
+        with open(self.path, 'rb') as f:
+            header = f.readline().decode('utf-8-sig')
+            delimiter = ';' if header.count(';') > header.count(',') else ','
+            names = next(csv.reader([header], delimiter=delimiter))
+            missing = [committee_id for committee_id in self.ids if committee_id not in names]
+            if missing:
+                raise ValueError("Brak kolumn: {}".format(", ".join(missing)))
+            columns = [names.index(committee_id) for committee_id in self.ids]
+            id_column = names.index('id') if 'id' in names else None
+            number = first_row
+            if start:
+                f.seek(start)
+            while True:
+                # Około chunk_size wierszy: readlines kończy po przekroczeniu podanej liczby bajtów
+                lines = f.readlines(chunk_size * 64)
+                if not lines:
+                    break
+                rows = [row for row in csv.reader(
+                    (line.decode('utf-8') for line in lines), delimiter=delimiter) if row]
+                if not rows:
+                    continue
+                cells = np.array([[row[column] for column in columns] for row in rows])
+                if delimiter == ';':
+                    cells = np.char.replace(cells, ',', '.')
+                supports = cells.astype(float)
+                if id_column is not None:
+                    ids = [row[id_column] for row in rows]
+                else:
+                    ids = [str(number + i) for i in range(len(rows))]
+                number += len(rows)
+                yield ids, supports, f.tell()
+
+
+def _put(target, item, alive):
+    # put do ograniczonej kolejki, który nie blokuje na zawsze, gdy druga strona przestała ją opróżniać
+    while alive():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _state_of(result):
+    if result is None:
+        return None
+    return {
+        'draws': result.draws,
+        'seat_counts': result.seat_counts.tolist(),
+        'district_wins': result.district_wins.tolist(),
+        'seat_sums': result.seat_sums.tolist(),
+        'coalition_counts': {str(mask): count for mask, count in result.coalition_counts.items()},
+    }
+
+
+def _result_of(state):
+    if state is None:
+        return None
+    return SimulationResult(
+        state['draws'], np.array(state['seat_counts']), np.array(state['district_wins']),
+        np.array(state['seat_sums']), Counter({int(mask): count for mask, count in state['coalition_counts'].items()}),
+    )
+
+
+class SweepRunner:
+    def __init__(self, calculator, method="dHondt", chunk_size=8192, queue_size=2, checkpoint_path=None,
+                 checkpoint_every=16, aggregate=True):
+        self.calculator = calculator
+        self.method = method
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size  # Ile paczek może czekać między etapami - ogranicza zużycie pamięci
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every  # Punkt kontrolny co tyle paczek
+        self.aggregate = aggregate
+        self.engine = CoalitionEngine([c.id for c in calculator.committees])
+
+    def settings(self, source):
+        return {
+            'source': source.signature(),
+            'method': self.method,
+            'thresholds': [c.threshold for c in self.calculator.committees],
+            'committees': [c.id for c in self.calculator.committees],
+            'aggregate': self.aggregate,  # Podsumowanie wznowionego przebiegu musi obejmować wszystkie paczki
+        }
+
+    def load_checkpoint(self, settings):
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint['settings'] != settings:
+            raise ValueError("Punkt kontrolny {} dotyczy innego przebiegu".format(self.checkpoint_path))
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint):
+        with open(self.checkpoint_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+    def _produce(self, chunks, output, stopped):
+        # Wątek czytający: put czeka, gdy obliczenia nie nadążają (kolejka ograniczona), i kończy się,
+        # gdy przebieg został przerwany
+        alive = lambda: not stopped.is_set()
+        try:
+            for chunk in chunks:
+                if not _put(output, chunk, alive):
+                    return
+        except Exception as e:
+            _put(output, e, alive)
+            return
+        _put(output, _END, alive)
+
+    def _consume(self, results, output, writer, state, total_mandates):
+        # Wątek zapisujący: wiersze wyników, agregaty i punkty kontrolne po zapisaniu paczki na dysk
+        try:
+            since_checkpoint = 0
+            while True:
+                item = results.get()
+                if item is _END:
+                    break
+                ids, mandates, constituency_mandates, position = item
+                if writer is not None:
+                    for scenario_id, row, constituency_row in zip(
+                            ids, mandates, constituency_mandates if writer.per_constituency else [None] * len(ids)):
+                        writer.write(scenario_id, self.method, row, constituency_row)
+                if self.aggregate:
+                    # Podsumowanie jak dla losowań Monte Carlo: rozkład mandatów, zwycięstwa w okręgach, koalicje
+                    chunk = SimulationResult.from_draws(constituency_mandates, total_mandates, self.engine)
+                    state['aggregate'] = chunk if state['aggregate'] is None else state['aggregate'].merge(chunk)
+                state['rows'] += len(ids)
+                state['position'] = position
+                since_checkpoint += 1
+                if self.checkpoint_path is not None and since_checkpoint >= self.checkpoint_every:
+                    self.checkpoint(output, state)
+                    since_checkpoint = 0
+            if self.checkpoint_path is not None:
+                self.checkpoint(output, state)
+        except Exception as e:
+            state['error'] = e
+            # Opróżniamy kolejkę do końca strumienia, żeby wątek obliczeń nie czekał na miejsce w niej
+            while results.get() is not _END:
+                pass
+
+    def checkpoint(self, output, state):
+        output_bytes = None
+        if output is not None:
+            output.flush()
+            os.fsync(output.fileno())
+            output_bytes = output.buffer.tell()
+        self.save_checkpoint({
+            'settings': state['settings'],
+            'rows': state['rows'],
+            'position': state['position'],
+            'output_bytes': output_bytes,
+            'aggregate': _state_of(state['aggregate']),
+        })
+
+    def run(self, source, output_path=None, output_format='csv', per_constituency=False):
+        # Paczki: odczyt (wątek) -> obliczenia (ten wątek) -> zapis (wątek), kolejki o stałym rozmiarze.
+        # Po wznowieniu plik wynikowy przycinamy do długości z punktu kontrolnego.
+        settings = self.settings(source)
+        settings['output'] = {'format': output_format, 'per_constituency': per_constituency}
+        checkpoint = self.load_checkpoint(settings)
+        state = {
+            'settings': settings,
+            'rows': checkpoint['rows'] if checkpoint else 0,
+            'position': checkpoint['position'] if checkpoint else 0,
+            'aggregate': _result_of(checkpoint['aggregate']) if checkpoint else None,
+            'error': None,
+        }
+
+        output = None
+        if output_path is not None:
+            resume = checkpoint is not None and checkpoint['output_bytes'] is not None
+            if resume:
+                with open(output_path, 'r+b') as f:
+                    f.truncate(checkpoint['output_bytes'])
+            output = io.TextIOWrapper(open(output_path, 'ab' if resume else 'wb'), encoding='utf-8', newline='')
+            writer = ResultWriter(output, output_format, self.calculator.committees,
+                                  self.calculator.constituencies, per_constituency, header=not resume)
+        else:
+            writer = None
+
+        per_row_constituencies = self.aggregate or per_constituency
+        total_mandates = int(self.calculator.constituency_sizes().sum())
+        chunks = queue.Queue(maxsize=self.queue_size)
+        results = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+        reader = threading.Thread(
+            target=self._produce,
+            args=(source.chunks(self.chunk_size, state['position'], state['rows']), chunks, stopped),
+            daemon=True,
+        )
+        consumer = threading.Thread(
+            target=self._consume, args=(results, output, writer, state, total_mandates), daemon=True
+        )
+        reader.start()
+        consumer.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if state['error'] is not None:
+                    break
+                ids, supports, position = item
+                result = self.calculator.calculate_mandates_batch(
+                    supports, self.method, per_constituency=per_row_constituencies
+                )
+                mandates, constituency_mandates = result if per_row_constituencies else (result, None)
+                if not _put(results, (ids, mandates, constituency_mandates, position), consumer.is_alive):
+                    break
+        finally:
+            stopped.set()
+            _put(results, _END, consumer.is_alive)
+            consumer.join()
+            if output is not None:
+                output.close()
+        if state['error'] is not None:
+            raise state['error']
+        return state['rows'], state['aggregate']
+
+
+def aggregate_payload(result, committees, constituencies):
+    ids = [committee.id for committee in committees]
+    engine = CoalitionEngine(ids)
+    return {
+        'rows': result.draws,
+        'mean_seats': dict(zip(ids, result.mean_seats().tolist())),
+        'majority_share': dict(zip(ids, result.majority_probability().tolist())),
+        'district_win_share': [
+            {'number': constituency.number, 'wins': dict(zip(ids, row))}
+            for constituency, row in zip(constituencies, result.district_win_probability().tolist())
+        ],
+        'coalitions': [
+            {'members': engine.member_ids(mask), 'share': share}
+            for mask, share in result.coalition_probability().items()
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Strumieniowe przeliczanie dużych przeglądów scenariuszy")
+    parser.add_argument('input', nargs='?', help="plik CSV ze scenariuszami (kolumny komitetów, opcjonalnie id)")
+    parser.add_argument('--grid', action='append', metavar='ID=START:STOP:KROK',
+                        help="siatka zamiast pliku, np. --grid td=0:20:0.5 --grid ko=30")
+    parser.add_argument('-o', '--output', help="wyniki dla każdego scenariusza (CSV/JSONL)")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--per-constituency', action='store_true', help="wiersz dla każdego okręgu")
+    parser.add_argument('--aggregate', help="plik JSON z podsumowaniem całego przeglądu")
+    parser.add_argument('--checkpoint', help="plik punktu kontrolnego; istniejący wznawia przerwany przebieg")
+    parser.add_argument('--checkpoint-every', type=int, default=16, help="co ile paczek zapisywać punkt kontrolny")
+    parser.add_argument('--method', choices=METHODS, default='dHondt')
+    parser.add_argument('--threshold', action='append', metavar='ID=PRÓG', help="np. --threshold td=8")
+    parser.add_argument('--data', default='wybory2023.csv', help="wyniki historyczne w okręgach")
+    parser.add_argument('--chunk-size', type=int, default=8192)
+    parser.add_argument('--queue-size', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    committees = default_committees()
+    try:
+        for committee_id, threshold in parse_thresholds(args.threshold, committees).items():
+            next(c for c in committees if c.id == committee_id).threshold = threshold
+        if (args.input is None) == (not args.grid):
+            raise ValueError("Podaj plik wejściowy albo --grid")
+        source = GridSpec.parse(args.grid, committees) if args.grid else CsvSource(args.input, committees)
+    except ValueError as e:
+        parser.error(str(e))
+
+    constituencies = load_constituencies(args.data)
+    calculator = ElectionCalculator(committees, constituencies)
+    runner = SweepRunner(calculator, args.method, args.chunk_size, args.queue_size, args.checkpoint,
+                         args.checkpoint_every, aggregate=args.aggregate is not None)
+    try:
+        rows, result = runner.run(source, args.output, args.output_format, args.per_constituency)
+    except (ValueError, KeyError) as e:
+        sys.exit("Błąd: {}".format(e))
+    if args.aggregate is not None and result is not None:
+        with open(args.aggregate, 'w', encoding='utf-8') as f:
+            json.dump(aggregate_payload(result, committees, constituencies), f, ensure_ascii=False, indent=2)
+    print("Przeliczono scenariuszy: {}".format(rows), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
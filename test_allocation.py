@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pytest
+
+from models import Constituency, default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+
+class BaselineCalculator:
+    # Kopia pierwotnej pętli kalkulatora (przed wektoryzacją) - wzorzec dla d'Hondta, Sainte-Laguë
+    # i Hare'a-Niemeyera, razem z poprawkami dla okręgów 21 (MN) i 32 (limit NL)
+    def __init__(self, committees, constituencies):
+        self.committees = committees
+        self.constituencies = constituencies
+        total_mandates = sum(c.size for c in constituencies)
+        self.pastSupport = {
+            party: sum(c.pastSupport[party] * c.size for c in constituencies) / total_mandates
+            for party in ['td', 'nl', 'pis', 'konf', 'ko']
+        }
+
+    def calculate_local_support(self, support, constituency):
+        past = [self.pastSupport.get(committee.id, 0) for committee in self.committees]
+        local_past = [constituency.pastSupport.get(committee.id, 0) for committee in self.committees]
+        deviation = [local / proj if proj != 0 else 0 for local, proj in zip(local_past, past)]
+        local_support = [s * dev for s, dev in zip(support, deviation)]
+        if constituency.number == 21:
+            local_support.append(5.37)
+        if constituency.number == 32:
+            for i, committee in enumerate(self.committees):
+                if committee.id == 'nl':
+                    local_support[i] = min(local_support[i], 1.8 * support[i])
+                    break
+        return local_support
+
+    def calculate_mandates(self, support, method):
+        mandates = [0] * len(self.committees)
+        for constituency in self.constituencies:
+            local_support = self.calculate_local_support(support, constituency)
+            constituency.support = local_support
+            constituency.mandates = [0] * len(self.committees)
+            filtered = [
+                0 if support[i] < self.committees[i].threshold else local_support[i]
+                for i in range(len(self.committees))
+            ]
+            if method == "HareNiemeyer":
+                seats = self.hare_niemeyer(filtered, constituency.size)
+            else:
+                step = 1 if method == "dHondt" else 2
+                quotients = [
+                    (filtered[i] / (step * k - step + 1), i)
+                    for k in range(1, constituency.size + 1) for i in range(len(self.committees))
+                ]
+                quotients.sort(key=lambda x: x[0], reverse=True)
+                seats = [0] * len(self.committees)
+                for _, i in quotients[:constituency.size]:
+                    seats[i] += 1
+            for i, seat in enumerate(seats):
+                mandates[i] += seat
+                constituency.mandates[i] += seat
+        return mandates
+
+    def hare_niemeyer(self, support, size):
+        hare_quota = sum(support) / size
+        mandates = [0] * len(support)
+        remainders = []
+        remaining = size
+        for i, value in enumerate(support):
+            if value > 0:
+                mandates[i] = int(value / hare_quota)
+                remaining -= mandates[i]
+                remainders.append((i, value / hare_quota - mandates[i]))
+        remainders.sort(key=lambda x: x[1], reverse=True)
+        for i, _ in remainders[:remaining]:
+            mandates[i] += 1
+        return mandates
+
+
+def random_scenarios(rng, count):
+    supports = rng.uniform(0, 45, (count, 5))
+    supports[:count // 4, 1] = rng.uniform(20, 40, count // 4)  # NL powyżej limitu w okręgu 32
+    supports[count // 4:count // 2] = np.round(supports[count // 4:count // 2])  # Całe punkty - więcej remisów
+    return supports
+
+
+@pytest.fixture(scope='module')
+def constituencies():
+    return load_constituencies(DATA_PATH, use_cache=False)
+
+
+@pytest.mark.parametrize('method', ["dHondt", "SainteLague", "HareNiemeyer"])
+def test_matches_baseline_loop(constituencies, method):
+    reference_constituencies = [Constituency(c.number, c.size, c.pastSupport) for c in constituencies]
+    reference = BaselineCalculator(default_committees(), reference_constituencies)
+    calculator = ElectionCalculator(default_committees(), constituencies)
+    supports = random_scenarios(np.random.default_rng(0), 200)
+    batch, batch_constituencies = calculator.calculate_mandates_batch(supports, method, per_constituency=True)
+    for support, mandates, constituency_mandates in zip(supports.tolist(), batch, batch_constituencies):
+        expected = reference.calculate_mandates(support, method)
+        assert calculator.calculate_mandates(support, method) == expected
+        assert mandates.tolist() == expected
+        for constituency, row, expected_constituency in zip(constituencies, constituency_mandates,
+                                                           reference_constituencies):
+            assert constituency.mandates == expected_constituency.mandates
+            assert row.tolist() == expected_constituency.mandates
+            assert constituency.support == expected_constituency.support
+
+
+def test_district_corrections(constituencies):
+    calculator = ElectionCalculator(default_committees(), constituencies)
+    support = [10, 30, 30, 5, 25]
+    calculator.calculate_mandates(support)
+    rows = {c.number: c for c in constituencies}
+    assert len(rows[21].support) == 6 and rows[21].support[-1] == 5.37
+    assert rows[32].support[1] == pytest.approx(1.8 * support[1])
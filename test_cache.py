@@ -0,0 +1,47 @@
+import os
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator
+from cache import SeatResultCache
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+
+def test_lru_eviction_order_and_counters():
+    cache = SeatResultCache(maxsize=2)
+    a, b, c = (cache.key([value], [5], "dHondt") for value in (1, 2, 3))
+    cache.put(a, 'a')
+    cache.put(b, 'b')
+    assert cache.get(a) == 'a'  # a staje się ostatnio używanym, więc przy dodaniu c wypada b
+    cache.put(c, 'c')
+    assert cache.get(b) is None
+    assert cache.get(a) == 'a' and cache.get(c) == 'c'
+    cache.put(b, 'b')  # wypada a - najdawniej używany po odczytach powyżej
+    assert cache.get(a) is None
+    assert cache.stats() == {'hits': 3, 'misses': 2, 'evictions': 2, 'size': 2, 'maxsize': 2}
+    cache.put(c, 'c2')  # nadpisanie istniejącego klucza nie usuwa innych wpisów
+    assert len(cache) == 2 and cache.evictions == 2 and cache.get(c) == 'c2'
+
+
+def test_key_rounds_support_and_includes_thresholds():
+    cache = SeatResultCache(decimals=2)
+    assert cache.key([30.004, 20], [5, 5], "dHondt") == cache.key([30.0, 20.0], (5, 5), "dHondt")
+    assert cache.key([30, 20], [5, 8], "dHondt") != cache.key([30, 20], [5, 5], "dHondt")
+    assert cache.key([30, 20], [5, 5], "dHondt") != cache.key([30, 20], [5, 5], "SainteLague")
+
+
+def test_cached_results_match_fresh_calculation():
+    constituencies = load_constituencies(DATA_PATH, use_cache=False)
+    cache = SeatResultCache(maxsize=8)
+    cached = ElectionCalculator(default_committees(), constituencies, cache=cache)
+    fresh = ElectionCalculator(default_committees(), load_constituencies(DATA_PATH, use_cache=False))
+    supports = [[14.4, 8.6, 35.4, 7.2, 30.7], [10, 9, 30, 12, 32], [14.4, 8.6, 35.4, 7.2, 30.7]]
+    for support in supports:
+        assert cached.calculate_mandates(support) == fresh.calculate_mandates(support)
+        assert [c.mandates for c in constituencies] == [c.mandates for c in fresh.constituencies]
+    assert cache.hits == 1 and cache.misses == 2
+    cached.committees[3].threshold = 8  # inne progi - inny klucz
+    fresh.committees[3].threshold = 8
+    assert cached.calculate_mandates(supports[0]) == fresh.calculate_mandates(supports[0])
+    assert cache.misses == 3
@@ -0,0 +1,65 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+
+from coalitions import CoalitionEngine, DEFAULT_CONFLICTS
+
+
+def brute_force(engine, seats, minimal):
+    # Wszystkie podzbiory komitetów: zgodne, z większością, a dla minimal - bez zbędnego członka
+    found = []
+    for mask in range(1, 1 << len(seats)):
+        members = engine.members(mask)
+        total = sum(seats[i] for i in members)
+        if total < engine.majority or not engine.compatible(mask):
+            continue
+        if minimal and any(total - seats[i] >= engine.majority for i in members):
+            continue
+        found.append((mask, total))
+    return sorted(found)
+
+
+def random_engine(rng, count):
+    ids = ['k{}'.format(i) for i in range(count)]
+    pairs = [pair for pair in itertools.combinations(ids, 2) if rng.random() < 0.25]
+    return CoalitionEngine(ids, conflicts=pairs + [('k0', 'spoza_listy')], majority=int(rng.integers(100, 300)))
+
+
+def random_seats(rng, count):
+    seats = rng.multinomial(460, rng.dirichlet(np.ones(count))).tolist()
+    if rng.random() < 0.3:
+        seats[int(rng.integers(count))] = 0  # Komitet bez mandatów
+    if rng.random() < 0.3:
+        seats[-1] = seats[0]  # Równe liczby mandatów
+    return seats
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        count = int(rng.integers(2, 11))
+        engine = random_engine(rng, count)
+        seats = random_seats(rng, count)
+        assert sorted(engine.minimal_winning_coalitions(seats)) == brute_force(engine, seats, minimal=True)
+        assert sorted(engine.winning_coalitions(seats)) == brute_force(engine, seats, minimal=False)
+
+
+def test_default_conflicts():
+    engine = CoalitionEngine(['td', 'nl', 'pis', 'konf', 'ko'])
+    seats = [65, 26, 194, 18, 157]
+    minimal = {tuple(engine.member_ids(mask)) for mask, _ in engine.minimal_winning_coalitions(seats)}
+    assert minimal == {('td', 'nl', 'ko'), ('td', 'konf', 'ko'), ('td', 'pis')}
+    for a, b in DEFAULT_CONFLICTS:
+        assert not engine.compatible(engine.mask([a, b]))
+
+
+def test_frequencies_match_per_row_search():
+    rng = np.random.default_rng(1)
+    engine = random_engine(rng, 6)
+    rows = [random_seats(rng, 6) for _ in range(40)]
+    rows += rows[:10]  # Powtórzone podziały korzystają z zapamiętanych wyników
+    expected = Counter()
+    for row in rows:
+        expected.update(mask for mask, _ in brute_force(engine, row, minimal=True))
+    assert engine.frequencies(np.array(rows)) == expected
@@ -0,0 +1,69 @@
+import io
+import os
+
+import numpy as np
+
+from data_loader import CACHE_DIR, load_constituencies, load_table, parse_table
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+UNITS_CSV = (
+    'TERYT;Gmina;Nr okręgu sejmowego;Uwagi;Trzecia Droga;Prawo i Sprawiedliwość;KO\n'
+    '020101;Gmina 0, x;1;lista A, lista B;1234,5;2000;\n'
+    '020102;Gmina 1;1;;10;20,25;30\n'
+)
+
+
+def test_semicolon_decimal_comma_only_in_numeric_columns():
+    table = parse_table(io.StringIO(UNITS_CSV), 'gminy.csv')
+    assert table.column('name') == ['Gmina 0, x', 'Gmina 1']
+    assert table.column('uwagi') == ['lista A, lista B', '']  # Nieznana kolumna tekstowa - bez zmian
+    assert table.column('teryt') == ['020101', '020102']
+    assert table.parties == ['td', 'pis', 'ko']
+    assert table.support.tolist() == [[1234.5, 2000.0, 0.0], [10.0, 20.25, 30.0]]
+    assert table.column('sejm_number').tolist() == [1.0, 1.0]
+
+
+def test_comma_delimited_table():
+    table = parse_table(io.StringIO('\ufeffNr okręgu,Mandaty,PiS,KO\n1,12,"40.5",30\n2,8,35,\n'))
+    assert table.parties == ['pis', 'ko']
+    assert table.column('size').tolist() == [12.0, 8.0]
+    assert table.support.tolist() == [[40.5, 30.0], [35.0, 0.0]]
+
+
+def test_cache_is_reused_and_invalidated(tmp_path):
+    path = tmp_path / 'okregi.csv'
+    path.write_text('Nr okręgu;Mandaty;PiS;KO\n1;12;40,5;30\n', encoding='utf-8')
+    first = load_table(str(path))
+    assert (tmp_path / CACHE_DIR / 'okregi.csv.npy').exists()
+    second = load_table(str(path))
+    assert isinstance(second.values, np.memmap) and second.support.tolist() == first.support.tolist()
+    stat = os.stat(path)
+
+    # Ta sama długość i czas modyfikacji - dane z pamięci podręcznej (sygnatura się nie zmieniła)
+    path.write_text('Nr okręgu;Mandaty;PiS;KO\n1;12;41,5;30\n', encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_table(str(path)).support.tolist() == [[40.5, 30.0]]
+
+    # Inny czas modyfikacji przy tej samej długości
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_table(str(path)).support.tolist() == [[41.5, 30.0]]
+
+    # Inna długość pliku przy tym samym czasie modyfikacji
+    stat = os.stat(path)
+    path.write_text('Nr okręgu;Mandaty;PiS;KO\n1;12;41,75;30\n', encoding='utf-8')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_table(str(path)).support.tolist() == [[41.75, 30.0]]
+    assert load_table(str(path), use_cache=False).support.tolist() == [[41.75, 30.0]]
+
+
+def test_cached_and_parsed_constituencies_match(tmp_path):
+    path = tmp_path / 'wybory2023.csv'
+    path.write_bytes(open(DATA_PATH, 'rb').read())
+    parsed = load_constituencies(str(path), use_cache=False)
+    load_constituencies(str(path))
+    cached = load_constituencies(str(path))
+    assert cached.numbers.tolist() == parsed.numbers.tolist()
+    assert cached.sizes.tolist() == parsed.sizes.tolist()
+    assert cached.parties == parsed.parties
+    assert np.array_equal(cached.past_support, parsed.past_support)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from models import Committee, Constituency
+from calculator import ElectionCalculator, available_methods
+from allocation import (
+    DIVISOR_METHODS, EXACT_DIVISORS, allocate_divisor, allocate_divisor_heap, divisor_table,
+    register_divisor_method
+)
+
+
+def reference_allocation(support, sizes, divisors):
+    # Pełna lista kwocjentów posortowana stabilnie: kwocjent malejąco, potem numer dzielnika i komitet
+    mandates = np.zeros(np.shape(support), dtype=np.int64)
+    for row, (local, size) in enumerate(zip(support, sizes)):
+        table = divisor_table(divisors, size)
+        quotients = [(-value / table[k], k, i) for k in range(size) for i, value in enumerate(local)]
+        for _, _, i in sorted(quotients)[:size]:
+            mandates[row, i] += 1
+    return mandates
+
+
+def random_support(rng, shape):
+    support = rng.uniform(0, 40, shape)
+    support[rng.random(shape) < 0.2] = 0
+    support[..., :10, :] = np.round(support[..., :10, :] / 5) * 5  # Równe kwocjenty między komitetami
+    return support
+
+
+def test_divisor_sequences():
+    expected = {
+        "dHondt": [1, 2, 3, 4],
+        "SainteLague": [1, 3, 5, 7],
+        "SainteLagueModified": [1.4, 3, 5, 7],
+        "Danish": [1, 4, 7, 10],
+        "Adams": [0, 1, 2, 3],
+        "Imperiali": [2, 3, 4, 5],
+        "HuntingtonHill": [0, np.sqrt(2), np.sqrt(6), np.sqrt(12)],
+    }
+    assert set(expected) <= set(DIVISOR_METHODS)
+    for name, divisors in expected.items():
+        assert np.allclose(DIVISOR_METHODS[name](4), divisors)
+
+
+@pytest.mark.parametrize('method', list(DIVISOR_METHODS))
+def test_vectorised_and_heap_match_reference(method):
+    rng = np.random.default_rng(1)
+    sizes = rng.integers(1, 21, 41)
+    for _ in range(20):
+        support = random_support(rng, (41, 5))
+        expected = reference_allocation(support.tolist(), sizes.tolist(), DIVISOR_METHODS[method])
+        assert np.array_equal(allocate_divisor(support, sizes, DIVISOR_METHODS[method]), expected)
+        assert np.array_equal(allocate_divisor_heap(support, sizes, DIVISOR_METHODS[method]), expected)
+
+
+@pytest.mark.parametrize('method', list(DIVISOR_METHODS))
+def test_batch_matches_single_scenarios(method):
+    rng = np.random.default_rng(2)
+    sizes = rng.integers(1, 21, 41)
+    supports = random_support(rng, (30, 41, 5))
+    batch = allocate_divisor(supports, sizes, DIVISOR_METHODS[method])
+    for support, mandates in zip(supports, batch):
+        assert np.array_equal(allocate_divisor_heap(support, sizes, DIVISOR_METHODS[method]), mandates)
+
+
+def test_zero_first_divisor_gives_every_list_a_seat():
+    support = np.array([[50.0, 0.5, 0.0, 10.0]])
+    for method in ("Adams", "HuntingtonHill"):
+        mandates = allocate_divisor(support, [3], DIVISOR_METHODS[method])
+        assert mandates.tolist() == [[1, 1, 0, 1]]
+
+
+def test_registered_method_is_available_to_calculator():
+    register_divisor_method("TestMethod", lambda size: 4 * np.arange(size, dtype=float) + 1)
+    try:
+        assert "TestMethod" in available_methods()
+        committees = [Committee('a', 'A', 5, [['a', 1]]), Committee('b', 'B', 5, [['b', 1]])]
+        constituencies = [Constituency(1, 3, {'a': 60.0, 'b': 40.0})]
+        calculator = ElectionCalculator(committees, constituencies)
+        # Kwocjenty a: 60, 12, 6.67; b: 40, 8 - trzeci mandat dla a
+        assert calculator.calculate_mandates([60, 40], "TestMethod") == [2, 1]
+    finally:
+        del DIVISOR_METHODS["TestMethod"]
+        EXACT_DIVISORS.pop("TestMethod", None)
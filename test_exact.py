@@ -0,0 +1,149 @@
+import io
+import os
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from models import default_committees
+from data_loader import load_constituencies, parse_table
+from calculator import ElectionCalculator
+from allocation import (
+    DIVISOR_METHODS, EXACT_DIVISORS, TIE_BREAKS, allocate_divisor_exact, allocate_hare_niemeyer, lot_draws,
+    tie_priority
+)
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+RULES = list(TIE_BREAKS) + [[2, 0, 1, 0, 3]]
+
+
+def exact_quotient(value, squared):
+    # Klucz kwocjentu v/sqrt(d): zerowy dzielnik przy niezerowych głosach - kwocjent nieskończony
+    if squared == 0:
+        return (1, value) if value > 0 else (0, 0)
+    return (0, Fraction(value * value) / squared)
+
+
+def fraction_divisor_reference(votes, sizes, method, tie_break, seed):
+    priority = tie_priority(np.asarray(votes), tie_break, seed).tolist()
+    mandates = np.zeros(np.shape(votes), dtype=np.int64)
+    for row, (local, size) in enumerate(zip(votes, sizes)):
+        squared = EXACT_DIVISORS[method](size)
+        candidates = sorted(
+            ((exact_quotient(value, squared[k]), -priority[row][i], -i, -k, i)
+             for i, value in enumerate(local) for k in range(size)),
+            reverse=True
+        )
+        for *_, i in candidates[:size]:
+            mandates[row, i] += 1
+    return mandates
+
+
+def fraction_hare_niemeyer_reference(votes, sizes, tie_break, seed):
+    priority = tie_priority(np.asarray(votes), tie_break, seed).tolist()
+    mandates = np.zeros(np.shape(votes), dtype=np.int64)
+    for row, (local, size) in enumerate(zip(votes, sizes)):
+        total = sum(value for value in local if value > 0)
+        remainders = []
+        for i, value in enumerate(local):
+            if value > 0:
+                quota = Fraction(value * size, total)
+                mandates[row, i] = quota.numerator // quota.denominator
+                remainders.append((-(quota - mandates[row, i]), priority[row][i], i))
+        remainders.sort()
+        for *_, i in remainders[:size - mandates[row].sum()]:
+            mandates[row, i] += 1
+    return mandates
+
+
+def random_votes(rng, trial, n_committees=5):
+    votes = rng.integers(0, [4, 12, 1000, 10 ** 6][trial % 4], (int(rng.integers(1, 6)), n_committees))
+    if trial % 3 == 0:
+        votes[:, 1] = votes[:, 0]  # Równe kwocjenty i reszty
+    if trial % 5 == 0:
+        votes[:, 3] = 2 * votes[:, 2]
+    return votes, rng.integers(1, 15, votes.shape[0])
+
+
+@pytest.mark.parametrize('method', list(DIVISOR_METHODS))
+@pytest.mark.parametrize('tie_break', RULES)
+def test_divisor_exact_matches_fraction_reference(method, tie_break):
+    rng = np.random.default_rng(0)
+    for trial in range(120):
+        votes, sizes = random_votes(rng, trial)
+        result = allocate_divisor_exact(votes, sizes, DIVISOR_METHODS[method], EXACT_DIVISORS[method], tie_break,
+                                        seed=trial)
+        expected = fraction_divisor_reference(votes.tolist(), sizes.tolist(), method, tie_break, trial)
+        assert np.array_equal(result, expected), (votes, sizes)
+
+
+@pytest.mark.parametrize('tie_break', ["lot", "votes_lot"])
+def test_hare_niemeyer_lot_matches_fraction_reference(tie_break):
+    rng = np.random.default_rng(1)
+    for trial in range(300):
+        votes, sizes = random_votes(rng, trial)
+        result = allocate_hare_niemeyer(votes, sizes, exact=True, tie_break=tie_break, seed=trial)
+        expected = fraction_hare_niemeyer_reference(votes.tolist(), sizes.tolist(), tie_break, trial)
+        assert np.array_equal(result, expected), (votes, sizes)
+
+
+def test_exact_squared_divisors():
+    assert EXACT_DIVISORS["HuntingtonHill"](4) == [0, 2, 6, 12]
+    assert EXACT_DIVISORS["SainteLagueModified"](3) == [Fraction(49, 25), 9, 25]
+    assert EXACT_DIVISORS["dHondt"](3) == [1, 4, 9]
+    assert EXACT_DIVISORS["Adams"](3) == [0, 1, 4]
+
+
+def test_lot_is_reproducible_and_depends_on_seed():
+    votes = np.array([[100, 100, 100, 100, 100]] * 41)
+    sizes = np.ones(41, dtype=np.int64)
+    first = allocate_divisor_exact(votes, sizes, DIVISOR_METHODS["dHondt"], EXACT_DIVISORS["dHondt"], "lot", seed=3)
+    again = allocate_divisor_exact(votes, sizes, DIVISOR_METHODS["dHondt"], EXACT_DIVISORS["dHondt"], "lot", seed=3)
+    other = allocate_divisor_exact(votes, sizes, DIVISOR_METHODS["dHondt"], EXACT_DIVISORS["dHondt"], "lot", seed=4)
+    assert np.array_equal(first, again)
+    assert not np.array_equal(first, other)
+    # Losowanie osobne w każdym okręgu: mandaty nie trafiają zawsze do tego samego komitetu
+    assert (first.sum(axis=0) > 0).sum() > 1
+    # Wynik okręgu zależy od jego numeru, a nie od miejsca w paczce
+    rows = np.array([5, 17, 30])
+    assert np.array_equal(lot_draws(votes[rows], 3, rows), lot_draws(votes, 3)[rows])
+    with pytest.raises(ValueError):
+        tie_priority(votes, "lot")
+
+
+def test_lot_independent_of_batch_layout():
+    constituencies = load_constituencies(DATA_PATH, use_cache=False)
+    calculator = ElectionCalculator(default_committees(), constituencies, tie_break="lot", exact=True,
+                                    valid_votes=constituencies.sizes * 50000, seed=7)
+    rng = np.random.default_rng(2)
+    # Poparcie z krokiem 0.2 pkt - przy 50000 głosów na mandat remisy zdarzają się często
+    supports = np.round(rng.uniform(0, 40, (10, 5)) * 5) / 5
+    supports[::2, 1] = supports[::2, 0]
+    for method in ("dHondt", "SainteLague", "HareNiemeyer"):
+        batch = calculator.calculate_mandates_batch(supports, method, chunk_size=3)
+        single = [calculator.calculate_mandates(support.tolist(), method) for support in supports]
+        assert batch.tolist() == single
+
+
+def test_votes_lot_prefers_more_votes():
+    for seed in range(50):
+        assert tie_priority(np.array([[10.1, 10.3]]), "votes_lot", seed).tolist() == [[1, 0]]
+    # Równa liczba głosów: rozstrzyga losowanie, więc dla różnych ziaren wygrywają różne komitety
+    winners = {tie_priority(np.array([[10.1, 10.1]]), "votes_lot", seed)[0].argmin() for seed in range(50)}
+    assert winners == {0, 1}
+
+
+def test_valid_votes_from_eligible_and_turnout():
+    table = parse_table(io.StringIO('Nr okręgu;Mandaty;Uprawnieni;Frekwencja;PiS\n1;12;1000;74,5;40\n'))
+    constituencies = table.constituencies()
+    assert constituencies.valid_votes.tolist() == [745.0]
+    assert constituencies.sizes.tolist() == [12]
+
+
+def test_vote_counts_require_valid_votes():
+    table = parse_table(io.StringIO('Nr okręgu;Mandaty;PiS;KO\n1;12;40;30\n'))
+    calculator = ElectionCalculator(default_committees(), table.constituencies(), exact=True)
+    with pytest.raises(ValueError):
+        calculator.vote_counts(np.array([[40.0, 30.0]]))
+    calculator.valid_votes = [1000]
+    assert calculator.vote_counts(np.array([[40.0, 30.25]])).tolist() == [[400, 302]]
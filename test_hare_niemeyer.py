@@ -0,0 +1,80 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from allocation import allocate_hare_niemeyer
+
+
+def reference_priority(local, tie_break, i):
+    # Kolejność przy równych resztach: reguła, potem indeks komitetu
+    if tie_break == "order":
+        return (i,)
+    if tie_break == "votes":
+        return (-local[i], i)
+    return (tie_break[i], i)
+
+
+def fraction_reference(votes, sizes, tie_break):
+    mandates = np.zeros(np.shape(votes), dtype=np.int64)
+    for row, (local, size) in enumerate(zip(votes, sizes)):
+        total = sum(value for value in local if value > 0)
+        remainders = []
+        for i, value in enumerate(local):
+            if value > 0:
+                quota = Fraction(value * size, total)
+                mandates[row, i] = quota.numerator // quota.denominator
+                remainders.append((-(quota - mandates[row, i]), reference_priority(local, tie_break, i), i))
+        remainders.sort()
+        for _, _, i in remainders[:size - mandates[row].sum()]:
+            mandates[row, i] += 1
+    return mandates
+
+
+@pytest.mark.parametrize('tie_break', ["order", "votes", [2, 0, 1, 0, 3]])
+def test_exact_matches_fraction_reference(tie_break):
+    rng = np.random.default_rng(0)
+    for trial in range(300):
+        n_committees = int(rng.integers(2, 6))
+        rule = tie_break if isinstance(tie_break, str) else tie_break[:n_committees]
+        votes = rng.integers(0, [4, 10, 1000, 10 ** 6][trial % 4], (int(rng.integers(1, 6)), n_committees))
+        if trial % 3 == 0:
+            votes[:, 1] = votes[:, 0]  # Równe reszty
+        sizes = rng.integers(1, 20, votes.shape[0])
+        result = allocate_hare_niemeyer(votes, sizes, exact=True, tie_break=rule)
+        assert np.array_equal(result, fraction_reference(votes.tolist(), sizes.tolist(), rule)), (rule, votes, sizes)
+
+
+def test_exact_large_votes_do_not_overflow():
+    votes = np.array([[3 * 10 ** 17, 10 ** 17 + 1, 2 * 10 ** 17]])
+    sizes = np.array([100])
+    result = allocate_hare_niemeyer(votes, sizes, exact=True)
+    assert np.array_equal(result, fraction_reference(votes.tolist(), sizes.tolist(), "order"))
+
+
+def test_exact_agrees_with_float_without_ties():
+    rng = np.random.default_rng(1)
+    votes = rng.integers(1000, 10 ** 6, (200, 41, 5))
+    sizes = rng.integers(7, 21, 41)
+    assert np.array_equal(allocate_hare_niemeyer(votes, sizes, exact=True),
+                          allocate_hare_niemeyer(votes.astype(float), sizes))
+
+
+def test_tie_break_rules_on_equal_remainders():
+    # Trzy komitety po 1/3 kwoty reszty przy jednym wolnym mandacie
+    support = np.array([[10.0, 10.0, 10.0]])
+    assert allocate_hare_niemeyer(support, [1]).tolist() == [[1, 0, 0]]
+    assert allocate_hare_niemeyer(support, [1], tie_break=[2, 1, 0]).tolist() == [[0, 0, 1]]
+    # Kwoty 0.4, 1.4 i 0.2: ostatni mandat przy równych resztach 0.4 - kolejność albo więcej głosów
+    votes = np.array([[2, 7, 1]])
+    assert allocate_hare_niemeyer(votes, [2], exact=True, tie_break="order").tolist() == [[1, 1, 0]]
+    assert allocate_hare_niemeyer(votes, [2], exact=True, tie_break="votes").tolist() == [[0, 2, 0]]
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        allocate_hare_niemeyer([[1.5, 2.0]], [1], exact=True)
+    with pytest.raises(ValueError):
+        allocate_hare_niemeyer([[1.0, 1.0]], [1], tie_break="nieznana")
+    with pytest.raises(ValueError):
+        allocate_hare_niemeyer([[1.0, 1.0]], [1], tie_break=[0, 1, 2])
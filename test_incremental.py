@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator, available_methods
+from cache import SeatResultCache
+from curves import build_seat_curve, scaled_support
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+
+def load():
+    return load_constituencies(DATA_PATH, use_cache=False)
+
+
+def assert_matches_full(calculator, support, method, thresholds=None):
+    reference = ElectionCalculator(default_committees(), load())
+    if thresholds is not None:
+        for committee, threshold in zip(reference.committees, thresholds):
+            committee.threshold = threshold
+    expected = reference.calculate_mandates(support, method)
+    diff = calculator.calculate_mandates_incremental(support, method, thresholds=thresholds)
+    assert diff.mandates == expected
+    assert [c.mandates for c in calculator.constituencies] == [c.mandates for c in reference.constituencies]
+    return diff
+
+
+@pytest.mark.parametrize('method', available_methods())
+@pytest.mark.parametrize('with_cache', [False, True])
+def test_random_party_and_threshold_changes(method, with_cache):
+    rng = np.random.default_rng(len(method))
+    cache = SeatResultCache(maxsize=16) if with_cache else None
+    calculator = ElectionCalculator(default_committees(), load(), cache=cache)
+    support = [14.4, 8.6, 35.4, 7.2, 30.7]
+    thresholds = [5, 5, 5, 5, 5]
+    previous = None
+    for step in range(60):
+        if step % 10 == 9:
+            party = int(rng.integers(5))
+            thresholds[party] = 8 if thresholds[party] == 5 else 5
+        else:
+            # Zmiana jednej partii - ścieżka pomijająca okręgi bez możliwej zmiany mandatu;
+            # co kilka kroków wartości wokół progu, żeby komitet wypadał i wracał
+            party = int(rng.integers(5))
+            low, high = (3.5, 9.0) if step % 4 == 0 else (0.0, 45.0)
+            support[party] = round(float(rng.uniform(low, high)), 2)
+        if step % 15 == 14:
+            support = [round(float(value), 2) for value in rng.uniform(3, 40, 5)]  # Zmiana wielu partii naraz
+        diff = assert_matches_full(calculator, list(support), method, list(thresholds))
+        if previous is not None:
+            changed = [i for i, (a, b) in enumerate(zip(previous, [c.mandates for c in calculator.constituencies]))
+                       if a != b]
+            assert diff.changed_constituencies == changed
+        previous = [c.mandates for c in calculator.constituencies]
+
+
+def test_full_recalculation_resets_incremental_state():
+    calculator = ElectionCalculator(default_committees(), load())
+    calculator.calculate_mandates_incremental([20, 20, 20, 20, 20])
+    calculator.calculate_mandates([10, 12, 30, 8, 40])
+    assert_matches_full(calculator, [10, 12, 30, 8, 38.5], "dHondt")
+
+
+def test_state_after_seat_curve_lookup():
+    # Odczyt z krzywej mandatów musi ustawić stan przyrostowy na odczytany scenariusz
+    constituencies = load()
+    calculator = ElectionCalculator(default_committees(), constituencies)
+    base = [20.0] * 5
+    calculator.calculate_mandates_incremental(base)
+    curve = build_seat_curve(default_committees(), constituencies, base, 4, "dHondt")
+    step = curve.step_of(15.0)
+    mandates = calculator.apply_precomputed(curve.support(step), curve.constituency_mandates(step), "dHondt")
+    assert mandates == ElectionCalculator(default_committees(), load()).calculate_mandates(curve.support(step))
+    assert_matches_full(calculator, scaled_support(base, 4, np.array([19.95]))[0].tolist(), "dHondt")
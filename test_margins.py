@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator
+from allocation import DIVISOR_METHODS, allocate_divisor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+SUPPORTS = [[14.4, 8.6, 35.4, 7.2, 30.7], [11.0, 5.2, 31.0, 4.8, 38.0]]
+EPS = 1e-7
+
+
+def seats_after(filtered, sizes, divisors, row, column, value):
+    local = filtered[row].copy()
+    local[column] = value
+    return int(allocate_divisor(local[None, :], sizes[row:row + 1], divisors)[0, column])
+
+
+@pytest.mark.parametrize('method', list(DIVISOR_METHODS))
+@pytest.mark.parametrize('support', SUPPORTS)
+def test_local_margins_are_tight(method, support):
+    calculator = ElectionCalculator(default_committees(), load_constituencies(DATA_PATH, use_cache=False))
+    margins = calculator.seat_margins(support, method)
+    filtered = calculator.apply_thresholds(support, calculator.local_support_matrix(support))
+    sizes = calculator.constituency_sizes()
+    divisors = DIVISOR_METHODS[method]
+    checked = 0
+    for (row, column), seats in np.ndenumerate(margins.mandates):
+        value = filtered[row, column]
+        gain = margins.gain_local[row, column]
+        if np.isfinite(gain) and value > 0:
+            step = max(gain, value) * EPS
+            assert seats_after(filtered, sizes, divisors, row, column, value + gain + step) == seats + 1
+            if gain > step:
+                assert seats_after(filtered, sizes, divisors, row, column, value + gain - step) == seats
+            checked += 1
+        loss = margins.loss_local[row, column]
+        if np.isfinite(loss):
+            step = value * EPS
+            assert seats > 0
+            assert seats_after(filtered, sizes, divisors, row, column, value - loss - step) == seats - 1
+            if loss > step:
+                assert seats_after(filtered, sizes, divisors, row, column, value - loss + step) == seats
+            checked += 1
+    assert checked > 100
+
+
+@pytest.mark.parametrize('method', ["dHondt", "SainteLague", "HuntingtonHill"])
+def test_national_margins_are_tight(method):
+    # Zmiana krajowego poparcia jednego komitetu o margines krajowy przesuwa mandat w danym okręgu,
+    # a zmiana tuż przed marginesem - nie
+    constituencies = load_constituencies(DATA_PATH, use_cache=False)
+    calculator = ElectionCalculator(default_committees(), constituencies)
+    support = np.array(SUPPORTS[0])
+    margins = calculator.seat_margins(support, method)
+
+    def district_seats(column, value):
+        changed = support.copy()
+        changed[column] = value
+        local_matrix = calculator.local_support_matrix(changed)
+        return calculator.allocate(calculator.apply_thresholds(changed, local_matrix), method)[:, column]
+
+    for column in range(support.size):
+        for row in np.argsort(margins.gain_national[:, column])[:3]:
+            gain = margins.gain_national[row, column]
+            if np.isfinite(gain):
+                step = max(gain, support[column]) * EPS
+                assert district_seats(column, support[column] + gain + step)[row] > margins.mandates[row, column]
+                assert district_seats(column, support[column] + gain - step)[row] == margins.mandates[row, column]
+        for row in np.argsort(margins.loss_national[:, column])[:3]:
+            loss = margins.loss_national[row, column]
+            if np.isfinite(loss):
+                step = support[column] * EPS
+                assert district_seats(column, support[column] - loss - step)[row] < margins.mandates[row, column]
+                assert district_seats(column, support[column] - loss + step)[row] == margins.mandates[row, column]
+
+
+def test_below_threshold_cannot_gain_locally():
+    calculator = ElectionCalculator(default_committees(), load_constituencies(DATA_PATH, use_cache=False))
+    margins = calculator.seat_margins([14.4, 8.6, 35.4, 4.0, 30.7])
+    assert np.isinf(margins.gain_national[:, 3]).all() and np.isinf(margins.loss_national[:, 3]).all()
+
+
+def test_hare_niemeyer_is_rejected():
+    calculator = ElectionCalculator(default_committees(), load_constituencies(DATA_PATH, use_cache=False))
+    with pytest.raises(ValueError):
+        calculator.seat_margins(SUPPORTS[0], "HareNiemeyer")
@@ -0,0 +1,78 @@
+import io
+import os
+
+import numpy as np
+import pytest
+
+from models import default_committees
+from data_loader import load_constituencies, parse_table
+from calculator import ElectionCalculator
+from municipal_model import MunicipalityModel
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+
+def synthetic_units(constituencies, per_constituency=3, seed=0):
+    # Gminy: po kilka w każdym okręgu, głosy komitetów wokół wyników okręgu oraz pozostałe głosy
+    # (kolumna spoza listy komitetów, większa w okręgu 21 - MN)
+    rng = np.random.default_rng(seed)
+    lines = ['TERYT;Gmina;Nr okręgu sejmowego;Trzecia Droga;Lewica;PiS;Konfederacja;KO;MN']
+    for constituency in constituencies:
+        past = np.array(list(constituency.pastSupport.values()))
+        for unit in range(per_constituency):
+            valid = rng.integers(2000, 200000)
+            other_share = rng.uniform(0.02, 0.2) + (0.05 if constituency.number == 21 else 0.0)
+            shares = rng.dirichlet(past * 2 + 1)
+            votes = np.floor(shares * valid * (1 - other_share)).astype(int).tolist()
+            other = int(valid * other_share)
+            lines.append('{:04d}{:02d};Gmina {}, {};{};{};{}'.format(
+                constituency.number, unit, constituency.number, unit, constituency.number,
+                ';'.join(str(v) for v in votes), other))
+    return parse_table(io.StringIO('\n'.join(lines) + '\n'), 'gminy.csv')
+
+
+@pytest.fixture(scope='module')
+def constituencies():
+    return load_constituencies(DATA_PATH, use_cache=False)
+
+
+@pytest.fixture
+def model(constituencies):
+    return MunicipalityModel(synthetic_units(constituencies), default_committees(), constituencies)
+
+
+@pytest.mark.parametrize('supports', [
+    [14.4, 8.6, 35.4, 7.2, 30.7],
+    [30.0, 0.0, 20.0, 10.0, 25.0],
+    [40.0, 20.0, 30.0, 15.0, 25.0],  # Suma ponad 100% - jak w trakcie przesuwania suwaków
+])
+def test_reproduces_national_input(model, supports):
+    # Wyniki okręgów ważone udziałem okręgu w głosach ważnych (suma wag jego gmin) dają wektor krajowy
+    local = model.local_support_matrix(supports)
+    constituency_weights = (model.aggregation > 0) @ model.weights
+    assert constituency_weights @ local == pytest.approx(supports, abs=1e-6)
+    shares = model.unit_shares(supports)
+    assert shares.sum(axis=-1) == pytest.approx(1.0)
+    assert (shares >= 0).all()
+    assert (local[:, np.array(supports) == 0] == 0).all()
+
+
+def test_warm_start_matches_cold_fit(constituencies):
+    units = synthetic_units(constituencies)
+    target = [20.0, 5.0, 33.0, 9.0, 28.0]
+    cold = MunicipalityModel(units, default_committees(), constituencies)
+    warm = MunicipalityModel(units, default_committees(), constituencies)
+    warm.local_support_matrix([14.4, 8.6, 35.4, 7.2, 30.7])
+    assert warm._last_factors is not None
+    assert warm.local_support_matrix(target) == pytest.approx(cold.local_support_matrix(target), abs=1e-6)
+    # Paczka scenariuszy nie korzysta z ciepłego startu i daje te same wyniki co pojedyncze wektory
+    batch = cold.local_support_matrix(np.array([target, [14.4, 8.6, 35.4, 7.2, 30.7]]))
+    assert batch[0] == pytest.approx(warm.local_support_matrix(target), abs=1e-6)
+
+
+def test_calculator_with_projection(constituencies, model):
+    calculator = ElectionCalculator(default_committees(), constituencies, projection=model)
+    mandates = calculator.calculate_mandates([14.4, 8.6, 35.4, 7.2, 30.7])
+    assert sum(mandates) == 460
+    batch = calculator.calculate_mandates_batch([[14.4, 8.6, 35.4, 7.2, 30.7]])
+    assert batch[0].tolist() == mandates
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from server import MAX_CHUNKS, SeatService, _init_worker
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+
+
+@pytest.fixture
+def service():
+    service = SeatService(DATA_PATH, workers=1)
+    yield service
+    service.close()
+
+
+def dispatch(service, path, request, method='POST'):
+    return asyncio.run(service.dispatch(method, path, json.dumps(request).encode('utf-8')))
+
+
+@pytest.mark.parametrize('thresholds', [[5, 5, 5, 5, 5], "td=8", 8])
+def test_thresholds_must_be_an_object(service, thresholds):
+    with pytest.raises(ValueError):
+        service.thresholds(thresholds)
+    status, payload = dispatch(service, '/simulate', {'poll_mean': [14, 9, 35, 7, 30], 'thresholds': thresholds})
+    assert status == 400 and 'error' in payload
+
+
+def test_thresholds_override_defaults(service):
+    assert service.thresholds(None) == (5, 5, 5, 5, 5)
+    assert service.thresholds({'konf': 8}) == (5, 5, 5, 8.0, 5)
+    with pytest.raises(ValueError):
+        service.thresholds({'xyz': 8})
+
+
+def test_simulate_limits_number_of_chunks(service, monkeypatch):
+    # Zamiast procesów roboczych: zapis zleconych paczek i natychmiastowy wynik dla jednego losowania
+    _init_worker(DATA_PATH, None)
+    calls = []
+
+    def run_in_pool(function, settings, thresholds, seed, chunk_draws):
+        calls.append(chunk_draws)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(function(settings, thresholds, seed, 1))
+        return future
+    monkeypatch.setattr(service, 'run_in_pool', run_in_pool)
+
+    status, _ = dispatch(service, '/simulate', {'poll_mean': [14, 9, 35, 7, 30], 'draws': 1000000, 'chunk_size': 1})
+    assert status == 200
+    assert len(calls) <= MAX_CHUNKS and sum(calls) == 1000000
+
+    calls.clear()
+    status, _ = dispatch(service, '/simulate', {'poll_mean': [14, 9, 35, 7, 30], 'draws': 10, 'chunk_size': 3})
+    assert status == 200 and calls == [3, 3, 3, 1]
+
+
+@pytest.mark.parametrize('chunk_size', [0, -3, 1000001])
+def test_simulate_rejects_invalid_chunk_size(service, chunk_size):
+    status, _ = dispatch(service, '/simulate',
+                         {'poll_mean': [14, 9, 35, 7, 30], 'draws': 100, 'chunk_size': chunk_size})
+    assert status == 400
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator, available_methods
+from solver import SeatTargetSolver
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wybory2023.csv')
+SUPPORT = [14.4, 8.6, 35.4, 7.2, 30.7]
+IDS = ['td', 'nl', 'pis', 'konf', 'ko']
+
+
+@pytest.fixture(scope='module')
+def calculator():
+    return ElectionCalculator(default_committees(), load_constituencies(DATA_PATH, use_cache=False))
+
+
+def coalition_seats(calculator, party, coalition, values, method):
+    candidates = np.repeat(np.array(SUPPORT)[None, :], len(values), axis=0)
+    candidates[:, IDS.index(party)] = values
+    return calculator.calculate_mandates_batch(candidates, method)[:, np.isin(IDS, coalition)].sum(axis=1)
+
+
+@pytest.mark.parametrize('method', available_methods())
+@pytest.mark.parametrize('party, coalition, targets', [
+    ('konf', None, [1, 15, 40]),
+    ('nl', None, [10, 35]),
+    ('td', ['td', 'ko'], [231, 260]),
+])
+def test_minimal_support_is_tight(calculator, method, party, coalition, targets):
+    solver = SeatTargetSolver(calculator)
+    members = [party] if coalition is None else coalition
+    for target in targets:
+        result = solver.minimal_support(SUPPORT, party, target, coalition, method)
+        assert result is not None and result > 0
+        # Cel osiągnięty tuż za wartością graniczną, a w żadnym punkcie poniżej - nie
+        assert coalition_seats(calculator, party, members, [result + 1e-9], method)[0] >= target
+        below = np.append(np.linspace(0, result, 400, endpoint=False), result - 2e-6)
+        assert (coalition_seats(calculator, party, members, below, method) < target).all()
+
+
+@pytest.mark.parametrize('method', ["dHondt", "HareNiemeyer"])
+def test_unreachable_and_already_reached(calculator, method):
+    solver = SeatTargetSolver(calculator)
+    assert solver.minimal_support(SUPPORT, 'konf', 461, method=method) is None
+    assert solver.minimal_support(SUPPORT, 'td', 150, coalition=['td', 'pis'], method=method) == 0.0
+
+
+def test_breakpoints_match_bisection(calculator):
+    # Ścieżka punktów przejścia (metody dzielnikowe) i bisekcja dają tę samą wartość graniczną
+    solver = SeatTargetSolver(calculator)
+    for target in (5, 20, 50):
+        breakpoints = solver.minimal_support(SUPPORT, 'nl', target, method="SainteLague")
+        bisection = solver._bisection(
+            np.array(SUPPORT, dtype=float), IDS.index('nl'), np.isin(IDS, ['nl']), target, "SainteLague", 100.0, 1e-7
+        )
+        assert bisection == pytest.approx(breakpoints, abs=2e-7)
+
+
+def test_invalid_coalition(calculator):
+    solver = SeatTargetSolver(calculator)
+    with pytest.raises(ValueError):
+        solver.minimal_support(SUPPORT, 'td', 10, coalition=['ko'])
+    with pytest.raises(ValueError):
+        solver.minimal_support(SUPPORT, 'td', 10, coalition=['td', 'xyz'])
@@ -0,0 +1,140 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import cli
+from models import default_committees
+from data_loader import load_constituencies
+from calculator import ElectionCalculator
+from sweep import CsvSource, GridSpec, SweepRunner, aggregate_payload
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(ROOT, 'wybory2023.csv')
+GRID = ['td=0:20:0.5', 'nl=3:12:0.5', 'pis=30:36:2', 'konf=5', 'ko=30']
+
+
+@pytest.fixture(scope='module')
+def constituencies():
+    return load_constituencies(DATA_PATH, use_cache=False)
+
+
+def make_source(kind, tmp_path, committees):
+    if kind == 'grid':
+        return GridSpec.parse(GRID, committees)
+    path = tmp_path / 'scenariusze.csv'
+    grid = GridSpec.parse(GRID, committees)
+    lines = ['id,' + ','.join(c.id for c in committees)]
+    for ids, supports, _ in grid.chunks(4096):
+        lines += ['s{},'.format(i) + ','.join(str(v) for v in row) for i, row in zip(ids, supports.tolist())]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return CsvSource(str(path), committees)
+
+
+def run(constituencies, source, output, checkpoint=None, **options):
+    committees = default_committees()
+    runner = SweepRunner(ElectionCalculator(committees, constituencies), chunk_size=97, queue_size=2,
+                         checkpoint_path=checkpoint, checkpoint_every=1, **options)
+    rows, result = runner.run(source, str(output), per_constituency=False)
+    return rows, json.dumps(aggregate_payload(result, committees, constituencies), sort_keys=True)
+
+
+def failing_write(after, delay=0.0):
+    # ResultWriter.write, który po `after` wierszach zgłasza błąd (np. pełny dysk)
+    original = cli.ResultWriter.write
+    calls = [0]
+
+    def write(self, *args):
+        calls[0] += 1
+        if calls[0] > after:
+            time.sleep(delay)
+            raise OSError("Brak miejsca na dysku")
+        return original(self, *args)
+    return write
+
+
+@pytest.mark.parametrize('kind', ['grid', 'csv'])
+def test_resume_after_interruption_is_byte_identical(constituencies, tmp_path, monkeypatch, kind):
+    source = make_source(kind, tmp_path, default_committees())
+    rows, aggregate = run(constituencies, source, tmp_path / 'pelny.csv')
+
+    checkpoint = str(tmp_path / 'sweep.ck')
+    with monkeypatch.context() as patch:
+        patch.setattr(cli.ResultWriter, 'write', failing_write(after=1000))
+        with pytest.raises(OSError):
+            run(constituencies, source, tmp_path / 'wznowiony.csv', checkpoint)
+    assert 0 < json.load(open(checkpoint))['rows'] < rows
+
+    resumed_rows, resumed_aggregate = run(constituencies, source, tmp_path / 'wznowiony.csv', checkpoint)
+    assert resumed_rows == rows
+    assert (tmp_path / 'wznowiony.csv').read_bytes() == (tmp_path / 'pelny.csv').read_bytes()
+    assert resumed_aggregate == aggregate
+
+
+def test_resume_after_kill_is_byte_identical(tmp_path):
+    command = [sys.executable, os.path.join(ROOT, 'sweep.py'), '--data', DATA_PATH, '--chunk-size', '64',
+               '--checkpoint-every', '1'] + ['--grid=' + spec for spec in GRID]
+    subprocess.run(command + ['-o', str(tmp_path / 'pelny.csv'), '--aggregate', str(tmp_path / 'pelny.json')],
+                   check=True, cwd=ROOT, capture_output=True)
+
+    resumed = ['-o', str(tmp_path / 'wznowiony.csv'), '--aggregate', str(tmp_path / 'wznowiony.json'),
+               '--checkpoint', str(tmp_path / 'sweep.ck')]
+    process = subprocess.Popen(command + resumed, cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while not (tmp_path / 'sweep.ck').exists() and process.poll() is None and time.time() < deadline:
+        time.sleep(0.005)
+    process.send_signal(signal.SIGKILL)
+    process.wait()
+    subprocess.run(command + resumed, check=True, cwd=ROOT, capture_output=True)
+    assert (tmp_path / 'wznowiony.csv').read_bytes() == (tmp_path / 'pelny.csv').read_bytes()
+    assert (tmp_path / 'wznowiony.json').read_bytes() == (tmp_path / 'pelny.json').read_bytes()
+
+
+def run_with_timeout(function, timeout=30):
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = function()
+        except Exception as e:
+            outcome['error'] = e
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "Przebieg zablokował się na kolejkach"
+    return outcome
+
+
+def test_failing_writer_raises_instead_of_deadlocking(constituencies, tmp_path, monkeypatch):
+    # Zapis zatrzymuje się, zanim zgłosi błąd - kolejki zdążą się zapełnić
+    monkeypatch.setattr(cli.ResultWriter, 'write', failing_write(after=50, delay=0.3))
+    before = threading.active_count()
+    source = GridSpec.parse(GRID, default_committees())
+    outcome = run_with_timeout(lambda: run(constituencies, source, tmp_path / 'wynik.csv'))
+    assert isinstance(outcome.get('error'), OSError)
+    time.sleep(0.5)
+    assert threading.active_count() == before  # Wątki czytający i zapisujący zakończone
+
+
+def test_failing_calculation_raises_and_keeps_checkpoint(constituencies, tmp_path, monkeypatch):
+    calls = [0]
+    original = ElectionCalculator.calculate_mandates_batch
+
+    def calculate(self, *args, **kwargs):
+        calls[0] += 1
+        if calls[0] > 5:
+            raise RuntimeError("Błąd obliczeń")
+        return original(self, *args, **kwargs)
+    monkeypatch.setattr(ElectionCalculator, 'calculate_mandates_batch', calculate)
+    source = GridSpec.parse(GRID, default_committees())
+    checkpoint = str(tmp_path / 'sweep.ck')
+    outcome = run_with_timeout(lambda: run(constituencies, source, tmp_path / 'wynik.csv', checkpoint))
+    assert isinstance(outcome.get('error'), RuntimeError)
+    state = json.load(open(checkpoint))
+    assert state['rows'] == 5 * 97
+    assert os.path.getsize(tmp_path / 'wynik.csv') == state['output_bytes']
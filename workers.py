@@ -0,0 +1,63 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class RecalculationJob(QRunnable):
+    def __init__(self, generation, compute, pipeline):
+        super().__init__()
+        self.generation = generation
+        self.compute = compute
+        self.pipeline = pipeline
+
+    def cancelled(self):
+        return not self.pipeline.is_current(self.generation)
+
+    def run(self):
+        if self.cancelled():
+            return
+        try:
+            result = self.compute(self.cancelled)
+        except Exception as e:
+            self.pipeline.job_failed.emit(self.generation, str(e))
+            return
+        if result is not None and not self.cancelled():
+            self.pipeline.job_finished.emit(self.generation, result)
+
+
+class RecalculationPipeline(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+    job_finished = Signal(int, object)
+    job_failed = Signal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Pipeline żyje w wątku GUI, więc sygnały emitowane z wątku roboczego trafiają tu przez kolejkę zdarzeń
+        self.job_finished.connect(self._on_job_finished)
+        self.job_failed.connect(self._on_job_failed)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # Kalkulator trzyma stan między przeliczeniami, więc zadania idą po kolei
+        self.generation = 0
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def submit(self, compute):
+        # Nowe zadanie zastępuje poprzednie: oczekujące wyrzucamy, a trwające przerwie się przy kolejnym etapie
+        self.generation += 1
+        self.pool.clear()
+        self.pool.start(RecalculationJob(self.generation, compute, self))
+
+    @Slot(int, object)
+    def _on_job_finished(self, generation, result):
+        if self.is_current(generation):
+            self.finished.emit(result)
+
+    @Slot(int, str)
+    def _on_job_failed(self, generation, message):
+        if self.is_current(generation):
+            self.failed.emit(message)
+
+    def shutdown(self):
+        self.generation += 1
+        self.pool.clear()
+        self.pool.waitForDone()